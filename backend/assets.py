@@ -0,0 +1,301 @@
+import os
+import re
+import sys
+import json
+import gzip
+import hashlib
+import threading
+from flask import abort, request, url_for
+from backend.config import Config
+from backend.precompressed import PrecompressedPage
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+
+
+class Assets:
+    """Minified, bundled and fingerprinted CSS/JS served with immutable caching"""
+
+    # Logical name used in templates -> static files concatenated into it
+    BUNDLES = {
+        'css/common.css': ['css/common.css'],
+        'css/admin.bundle.css': ['css/common.css', 'css/admin.css'],
+        'css/student.bundle.css': ['css/common.css', 'css/student.css'],
+        'css/teacher.bundle.css': ['css/common.css', 'css/teacher.css'],
+        'js/admin.js': ['js/admin.js'],
+        'js/student.js': ['js/student.js']
+    }
+
+    MIMETYPES = {'.css': 'text/css', '.js': 'application/javascript'}
+    URL_PREFIX = '/assets/'
+    IMMUTABLE_MAX_AGE = 31536000  # fingerprinted names never change content
+
+    _lock = threading.Lock()
+    _manifest = None  # logical name -> fingerprinted file name
+    _files = None     # fingerprinted file name -> PrecompressedPage
+
+    # ==================== MINIFICATION ====================
+
+    @classmethod
+    def minify_css(cls, text):
+        """Drop comments and redundant whitespace (spaces before ':' are kept, they matter in selectors)"""
+        text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        text = re.sub(r':\s+', ':', text)
+        return text.replace(';}', '}').strip()
+
+    # A '/' after one of these (or at the start of a line) begins a regex literal, not a division
+    _REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+    @classmethod
+    def _scan_js_line(cls, line, state):
+        """Drop /* */ comments from one line, tracking strings, regexes and template literals.
+
+        state is None (code), '/*' or '`' as carried over from the previous line; returns (code, state).
+        """
+        out, i, n = [], 0, len(line)
+        while i < n:
+            if state == '/*':
+                end = line.find('*/', i)
+                if end < 0:
+                    return ''.join(out), state
+                i, state = end + 2, None
+                out.append(' ')
+                continue
+            if state == '`':
+                ch = line[i]
+                out.append(ch)
+                if ch == '\\':
+                    out.append(line[i + 1:i + 2])
+                    i += 2
+                    continue
+                i += 1
+                if ch == '`':
+                    state = None
+                continue
+            ch, nxt = line[i], line[i + 1:i + 2]
+            if ch == '/' and nxt == '/':
+                out.append(line[i:])
+                break
+            if ch == '/' and nxt == '*':
+                state, i = '/*', i + 2
+                continue
+            if ch == '`':
+                state = '`'
+                out.append(ch)
+                i += 1
+                continue
+            if ch in '\'"' or (ch == '/' and (''.join(out).rstrip()[-1:] or ';') in cls._REGEX_PRECEDERS):
+                # string or regex literal: copy through to its unescaped closing delimiter
+                j, in_class = i + 1, False
+                while j < n:
+                    if line[j] == '\\':
+                        j += 2
+                        continue
+                    if ch == '/' and line[j] in '[]':
+                        in_class = line[j] == '['
+                    elif line[j] == ch and not in_class:
+                        break
+                    j += 1
+                out.append(line[i:j + 1])
+                i = j + 1
+                continue
+            out.append(ch)
+            i += 1
+        return ''.join(out), state
+
+    @classmethod
+    def minify_js(cls, text):
+        """Line-based and conservative: strip indentation, blank lines and comments, keep line breaks.
+
+        Lines inside a multi-line template literal are kept verbatim, whitespace included.
+        """
+        lines, state = [], None
+        for line in text.splitlines():
+            in_template = state == '`'
+            code, state = cls._scan_js_line(line, state)
+            if not in_template:
+                code = code.lstrip()
+                if not code or code.startswith('//'):
+                    continue
+            if state != '`':
+                code = code.rstrip()
+            lines.append(code)
+        return '\n'.join(lines)
+
+    @classmethod
+    def minify(cls, name, text):
+        return cls.minify_css(text) if name.endswith('.css') else cls.minify_js(text)
+
+    @classmethod
+    def minify_html(cls, html):
+        """Minify the inline <style> and <script> blocks of a pre-rendered page"""
+        html = re.sub(
+            r'(<style[^>]*>)(.*?)(</style>)',
+            lambda m: m.group(1) + cls.minify_css(m.group(2)) + m.group(3), html, flags=re.S | re.I
+        )
+        return re.sub(
+            r'(<script(?![^>]*\bsrc=)[^>]*>)(.*?)(</script>)',
+            lambda m: m.group(1) + cls.minify_js(m.group(2)) + m.group(3), html, flags=re.S | re.I
+        )
+
+    # ==================== BUILD ====================
+
+    @classmethod
+    def _read_sources(cls, sources):
+        texts = []
+        for source in sources:
+            with open(os.path.join(STATIC_DIR, source), encoding='utf-8') as f:
+                texts.append(f.read())
+        return '\n'.join(texts)
+
+    @classmethod
+    def sources_digest(cls):
+        """Digest of every source file, so a stale prebuilt manifest is noticed"""
+        digest = hashlib.sha256()
+        for source in sorted({s for sources in cls.BUNDLES.values() for s in sources}):
+            with open(os.path.join(STATIC_DIR, source), 'rb') as f:
+                digest.update(source.encode('utf-8') + b'\0' + f.read())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls):
+        """{logical name: (fingerprinted name, minified bytes, source bytes)}"""
+        outputs = {}
+        for logical, sources in cls.BUNDLES.items():
+            text = cls._read_sources(sources)
+            body = cls.minify(logical, text).encode('utf-8')
+            stem, ext = os.path.splitext(logical)
+            fingerprinted = f'{stem}.{hashlib.sha256(body).hexdigest()[:10]}{ext}'
+            outputs[logical] = (fingerprinted, body, len(text.encode('utf-8')))
+        return outputs
+
+    @classmethod
+    def write(cls, out_dir=None):
+        """Build step: write fingerprinted files, their .gz/.br variants and manifest.json"""
+        out_dir = out_dir or Config.ASSET_DIST_DIR
+        outputs = cls.build()
+        for fingerprinted, body, _ in outputs.values():
+            path = os.path.join(out_dir, fingerprinted)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(body)
+            for encoding, data in PrecompressedPage.compress(body).items():
+                with open(f"{path}.{'gz' if encoding == 'gzip' else encoding}", 'wb') as f:
+                    f.write(data)
+
+        manifest = {
+            'sources_digest': cls.sources_digest(),
+            'assets': {logical: fingerprinted for logical, (fingerprinted, _, _) in outputs.items()}
+        }
+        with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return outputs
+
+    # ==================== RUNTIME ====================
+
+    @classmethod
+    def _page(cls, fingerprinted, body, compressed=None):
+        mimetype = cls.MIMETYPES.get(os.path.splitext(fingerprinted)[1], 'application/octet-stream')
+        return PrecompressedPage(body, mimetype, max_age=cls.IMMUTABLE_MAX_AGE, immutable=True, compressed=compressed)
+
+    @classmethod
+    def _load_prebuilt(cls):
+        """Files from the build step, or None when missing or built from older sources"""
+        try:
+            with open(os.path.join(Config.ASSET_DIST_DIR, 'manifest.json')) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('sources_digest') != cls.sources_digest():
+            print("⚠️ Prebuilt assets are stale, rebuilding in memory")
+            return None
+
+        files = {}
+        for fingerprinted in manifest['assets'].values():
+            path = os.path.join(Config.ASSET_DIST_DIR, fingerprinted)
+            with open(path, 'rb') as f:
+                body = f.read()
+            compressed = {}
+            for encoding, suffix in (('gzip', 'gz'), ('br', 'br')):
+                if os.path.exists(f'{path}.{suffix}'):
+                    with open(f'{path}.{suffix}', 'rb') as f:
+                        compressed[encoding] = f.read()
+            files[fingerprinted] = cls._page(fingerprinted, body, compressed or None)
+        return manifest['assets'], files
+
+    @classmethod
+    def _ensure_loaded(cls):
+        """Prebuilt files when present, otherwise an in-memory build on first use"""
+        if cls._files is not None:
+            return
+        with cls._lock:
+            if cls._files is not None:
+                return
+            loaded = cls._load_prebuilt()
+            if loaded is None:
+                outputs = cls.build()
+                loaded = (
+                    {logical: fingerprinted for logical, (fingerprinted, _, _) in outputs.items()},
+                    {fingerprinted: cls._page(fingerprinted, body) for fingerprinted, body, _ in outputs.values()}
+                )
+            cls._manifest, cls._files = loaded
+
+    @classmethod
+    def url(cls, logical):
+        """Fingerprinted URL of a bundle or asset (plain /static/ URL for anything not in BUNDLES)"""
+        if logical not in cls.BUNDLES:
+            return url_for('static', filename=logical)
+        cls._ensure_loaded()
+        return f'{cls.URL_PREFIX}{cls._manifest[logical]}'
+
+    @classmethod
+    def serve(cls, filename):
+        cls._ensure_loaded()
+        page = cls._files.get(filename)
+        if page is None:
+            abort(404)
+        return page.response(request)
+
+    @classmethod
+    def init_app(cls, app):
+        """Register the asset_url() template helper and the immutable /assets/ route"""
+        app.add_template_global(cls.url, 'asset_url')
+        app.add_url_rule(f'{cls.URL_PREFIX}<path:filename>', 'assets', cls.serve)
+
+    # ==================== REPORT ====================
+
+    @classmethod
+    def report(cls, outputs):
+        """Bytes per template: referenced assets and inline blocks, before and after minification"""
+        rows = []
+        for name in sorted(os.listdir(TEMPLATE_DIR)):
+            with open(os.path.join(TEMPLATE_DIR, name), encoding='utf-8') as f:
+                html = f.read()
+            inline = ''.join(re.findall(r'<style[^>]*>.*?</style>|<script(?![^>]*\bsrc=)[^>]*>.*?</script>', html, flags=re.S | re.I))
+            raw = len(inline.encode('utf-8'))
+            minified = len(cls.minify_html(inline).encode('utf-8'))
+            gzipped = len(gzip.compress(cls.minify_html(inline).encode('utf-8'))) if inline else 0
+            for logical in re.findall(r"asset_url\('([^']+)'\)", html):
+                if logical in outputs:
+                    _, body, source_bytes = outputs[logical]
+                    raw += source_bytes
+                    minified += len(body)
+                    gzipped += len(gzip.compress(body))
+            rows.append((name, raw, minified, gzipped))
+        return rows
+
+
+if __name__ == '__main__':
+    # Build step: python -m backend.assets [out_dir]
+    outputs = Assets.write(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"📦 Built {len(outputs)} assets into {sys.argv[1] if len(sys.argv) > 1 else Config.ASSET_DIST_DIR}")
+    for logical, (fingerprinted, body, source_bytes) in outputs.items():
+        print(f"   {logical:<26} -> {fingerprinted:<34} {source_bytes:>8} -> {len(body):>8} B")
+
+    print(f"\n{'page':<24} {'source B':>9} {'minified B':>11} {'gzip B':>8} {'saved':>7}")
+    for name, raw, minified, gzipped in Assets.report(outputs):
+        saved = f'{(1 - gzipped / raw) * 100:.0f}%' if raw else '-'
+        print(f"{name:<24} {raw:>9} {minified:>11} {gzipped:>8} {saved:>7}")
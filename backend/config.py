@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from datetime import timedelta
 
@@ -13,6 +14,7 @@ class Config:
     # ==================== JWT CONFIG ====================
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", SECRET_KEY)
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 256))  # verified tokens kept in memory
     
     # ==================== SESSION CONFIG ====================
     SESSION_TYPE = None
@@ -29,6 +31,104 @@ class Config:
     SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
     DATABASE_URL = os.getenv("DATABASE_URL", "")
     
+    # ==================== PAGE CACHE CONFIG ====================
+    PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", 86400))  # pre-rendered pages, revalidated by ETag after this
+    # Output of `python -m backend.assets`; without it assets are built in memory on first use
+    ASSET_DIST_DIR = os.getenv("ASSET_DIST_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "dist"))
+    
+    # ==================== HEALTH CHECK CONFIG ====================
+    HEALTH_CHECK_TTL = int(os.getenv("HEALTH_CHECK_TTL", 30))  # seconds a deep check result is reused
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", 5))
+    
+    # ==================== EXPORT CONFIG ====================
+    EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 1000))
+    EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", 8 * 1024 * 1024))
+    EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", 50000))
+    
+    # ==================== BACKGROUND JOB CONFIG ====================
+    # Job state and artifacts live on local disk, shared by the gunicorn workers of one host.
+    # Serverless instances (VERCEL) freeze threads once the response is sent and keep their own
+    # /tmp, so there exports stream directly and emailed reports are generated inside the request.
+    BACKGROUND_JOBS_ENABLED = os.getenv("BACKGROUND_JOBS_ENABLED", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+    
+    # ==================== EXPORT JOB CONFIG ====================
+    EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", 2))
+    EXPORT_JOB_MAX_PENDING = int(os.getenv("EXPORT_JOB_MAX_PENDING", 10))
+    EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "library_exports"))
+    EXPORT_JOB_TTL = int(os.getenv("EXPORT_JOB_TTL", 3600))
+    
+    # ==================== EXPORT CACHE CONFIG ====================
+    EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "library_export_cache"))
+    EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    # Data versions live in EXPORT_CACHE_DIR on the local disk, so a write handled by one host
+    # cannot invalidate another host's copies. The export cache and report snapshots are only
+    # correct for the single-host gunicorn deployment (its workers share the directory); they
+    # are off by default on Vercel, where every instance has its own /tmp.
+    EXPORT_CACHE_ENABLED = os.getenv("EXPORT_CACHE_ENABLED", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+    
+    # ==================== IMPORT CONFIG ====================
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+    IMPORT_ERROR_LIMIT = int(os.getenv("IMPORT_ERROR_LIMIT", 100))
+
+    # ==================== IMPORT JOB CONFIG ====================
+    IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", 1))
+    IMPORT_JOB_MAX_PENDING = int(os.getenv("IMPORT_JOB_MAX_PENDING", 5))
+    IMPORT_JOB_DIR = os.getenv("IMPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "library_imports"))
+    IMPORT_JOB_TTL = int(os.getenv("IMPORT_JOB_TTL", 86400))
+    # A queued/running job whose owner has not written state.json for this long is treated as interrupted
+    IMPORT_JOB_HEARTBEAT_TIMEOUT = int(os.getenv("IMPORT_JOB_HEARTBEAT_TIMEOUT", 120))
+
+    # ==================== REPORT JOB CONFIG ====================
+    REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", 1))
+    REPORT_JOB_MAX_PENDING = int(os.getenv("REPORT_JOB_MAX_PENDING", 5))
+    REPORT_JOB_TTL = int(os.getenv("REPORT_JOB_TTL", 3600))
+    REPORT_JOB_DIR = os.getenv("REPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "library_report_jobs"))
+
+    # ==================== REPORT SNAPSHOT CONFIG ====================
+    REPORT_SNAPSHOT_DIR = os.getenv("REPORT_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "library_report_snapshots"))
+
+    # ==================== MAIL OUTBOX CONFIG ====================
+    MAIL_OUTBOX_PATH = os.getenv("MAIL_OUTBOX_PATH", os.path.join(tempfile.gettempdir(), "library_mail_outbox.sqlite3"))
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("MAIL_OUTBOX_MAX_ATTEMPTS", 8))
+    MAIL_OUTBOX_BACKOFF = int(os.getenv("MAIL_OUTBOX_BACKOFF", 30))
+    MAIL_OUTBOX_MAX_BACKOFF = int(os.getenv("MAIL_OUTBOX_MAX_BACKOFF", 3600))
+    MAIL_OUTBOX_POLL_INTERVAL = int(os.getenv("MAIL_OUTBOX_POLL_INTERVAL", 60))
+    MAIL_OUTBOX_LINGER = float(os.getenv("MAIL_OUTBOX_LINGER", 2))
+    MAIL_TRIGGER_TIMEOUT = float(os.getenv("MAIL_TRIGGER_TIMEOUT", 8))  # cron trigger waits this long for SMTP
+
+    # ==================== MAIL ATTACHMENT CONFIG ====================
+    MAIL_ATTACHMENT_ZIP = os.getenv("MAIL_ATTACHMENT_ZIP", "true").lower() == "true"
+    MAIL_ATTACHMENT_MAX_BYTES = int(os.getenv("MAIL_ATTACHMENT_MAX_BYTES", 15 * 1024 * 1024))
+    MAIL_OVERSIZE_MODE = os.getenv("MAIL_OVERSIZE_MODE", "split")  # 'split' by month, else the zipped CSV alone or a summary
+    # Data of summary-only mails is kept here (not LRU-evicted) for the download link in the mail
+    REPORT_ARTIFACT_DIR = os.getenv("REPORT_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "library_report_artifacts"))
+    REPORT_ARTIFACT_TTL = int(os.getenv("REPORT_ARTIFACT_TTL", 30 * 86400))
+    
+    # ==================== RATE LIMIT CONFIG ====================
+    # Specs are 'tokens per second/burst'; route rules are keyed by Flask endpoint and apply per client
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_CLIENT = os.getenv("RATE_LIMIT_CLIENT", "20/60")
+    # Kiosks normally share the college NAT address, so their endpoints draw from a separate, larger
+    # per-address bucket instead of RATE_LIMIT_CLIENT (admin browsing cannot starve them, or vice versa)
+    RATE_LIMIT_KIOSK = os.getenv("RATE_LIMIT_KIOSK", "50/150")
+    RATE_LIMIT_KIOSK_ENDPOINTS = os.getenv(
+        "RATE_LIMIT_KIOSK_ENDPOINTS",
+        "student.check_visitor,student.student_visit,student.student_exit,"
+        "teacher.check_teacher,teacher.teacher_entry,teacher.teacher_exit"
+    )
+    RATE_LIMIT_ROUTES = os.getenv(
+        "RATE_LIMIT_ROUTES",
+        "student.check_visitor=20/60;teacher.check_teacher=10/30;admin.admin_login=0.2/5;"
+        "admin.all_visitors=1/5;admin.admin_teachers_all=1/5;admin.export_data=0.2/3"
+    )
+    RATE_LIMIT_MAX_IN_FLIGHT = int(os.getenv("RATE_LIMIT_MAX_IN_FLIGHT", 64))  # 0 disables load shedding
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # 'memory' or 'sqlite' (shared by local workers)
+    RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", os.path.join(tempfile.gettempdir(), "library_rate_limits.sqlite3"))
+    # Proxies in front of the app that append to X-Forwarded-For. Only these right-most hops are
+    # trusted for the client address; 0 (bare gunicorn) uses the socket peer address, since any
+    # header would be client-forged. Vercel sets 1 automatically; set 1 behind nginx.
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 1 if os.getenv("VERCEL") else 0))
+    
     # ==================== VALIDATION METHOD ====================
     @classmethod
     def validate_config(cls):
@@ -1,19 +1,29 @@
-import smtplib
 import os
+import io
+import re
+import zipfile
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 from datetime import datetime, timedelta
-import io
-import csv
-import pandas as pd
-from backend.supabase_direct import SupabaseDirect as Database
+from backend.config import Config
+from backend.mail_outbox import MailOutbox
+from backend.export_cache import ExportCache
+from backend.report_snapshots import ReportSnapshots
 
 
 class EmailService:
     """Email service for sending library reports"""
     
+    # Report name -> generator, for batched runs
+    REPORTS = {
+        'monthly': 'send_monthly_report',
+        'lifetime': 'send_lifetime_report',
+        'monthly_teachers': 'send_monthly_report_teachers',
+        'lifetime_teachers': 'send_lifetime_report_teachers'
+    }
+    
     @classmethod
     def _get_email_config(cls):
         """Get email configuration from environment variables"""
@@ -22,49 +32,158 @@ class EmailService:
             'port': int(os.getenv('MAIL_PORT', 587)),
             'username': os.getenv('MAIL_USERNAME', ''),
             'password': os.getenv('MAIL_PASSWORD', ''),
-            'recipient': os.getenv('MAIL_RECIPIENT', ''),
-            'sender': os.getenv('MAIL_SENDER', os.getenv('MAIL_USERNAME', ''))
+            'recipients': cls._parse_recipients(os.getenv('MAIL_RECIPIENT', '')),
+            'sender': os.getenv('MAIL_SENDER', os.getenv('MAIL_USERNAME', '')),
+            'timeout': int(os.getenv('MAIL_TIMEOUT', 30))
         }
     
+    @classmethod
+    def _parse_recipients(cls, value):
+        """MAIL_RECIPIENT may list several addresses separated by commas or semicolons"""
+        return [address.strip() for address in value.replace(';', ',').split(',') if address.strip()]
+    
     @classmethod
     def _is_configured(cls):
         """Check if email is properly configured"""
         config = cls._get_email_config()
-        return all([config['username'], config['password'], config['recipient']])
+        return all([config['username'], config['password'], config['recipients']])
     
     @classmethod
-    def _generate_csv_attachment(cls, data, filename):
-        """Generate CSV file from data"""
-        if not data:
-            return None
-        
-        output = io.StringIO()
-        if len(data) > 0:
-            fieldnames = list(data[0].keys())
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+    def start_outbox(cls):
+        """Start the outbox sender for this process (safe to call repeatedly)"""
+        MailOutbox.start(cls._get_email_config)
+    
+    @classmethod
+    def _deliver(cls, messages, report, period, force=False):
+        """Hand a report's messages to the outbox; the sender worker delivers them with retries"""
+        cls.start_outbox()
+        entry_ids = []
+        for suffix, msg in messages:
+            entry_id, _ = MailOutbox.enqueue(report, f'{period}{suffix}', msg, force)
+            entry_ids.append(entry_id)
+        return entry_ids
+    
+    # ==================== ATTACHMENTS ====================
+    
+    ATTACHMENTS_SECTION = re.compile(r'<h3>📎 Attachments</h3>.*?</ul>', re.S)
+    
+    @classmethod
+    def _zip(cls, files):
+        """One deflated ZIP archive holding [(filename, bytes)]"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for filename, data in files:
+                # XLSX is already a deflated ZIP, so it is stored rather than compressed twice
+                compress = zipfile.ZIP_STORED if filename.endswith('.xlsx') else zipfile.ZIP_DEFLATED
+                archive.writestr(filename, data, compress_type=compress)
+        return buffer.getvalue()
+    
+    @classmethod
+    def _attachment_parts(cls, files, archive_name, zipped=False):
+        """Base64 MIME parts for [(filename, bytes)], packed into one ZIP when MAIL_ATTACHMENT_ZIP is on (or zipped)"""
+        if Config.MAIL_ATTACHMENT_ZIP or zipped:
+            files = [(f'{archive_name}.zip', cls._zip(files))]
+        parts = []
+        for filename, data in files:
+            part = MIMEBase('application', 'zip' if filename.endswith('.zip') else 'octet-stream')
+            part.set_payload(data)
+            encoders.encode_base64(part)
+            part.add_header('Content-Disposition', f'attachment; filename={filename}')
+            parts.append(part)
+        return parts
+    
+    @classmethod
+    def _encoded_size(cls, parts):
+        """Bytes the attachments add to the message once base64-encoded"""
+        return sum(len(part.get_payload()) for part in parts)
+    
+    @classmethod
+    def _message(cls, config, subject, body, parts):
+        msg = MIMEMultipart()
+        msg['From'] = config['sender']
+        msg['To'] = ', '.join(config['recipients'])
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html'))
+        for part in parts:
+            msg.attach(part)
+        return msg
+    
+    @classmethod
+    def _split_by_month(cls, month_files, archive_name):
+        """Group [(month, files)] into [(months, parts)] each within the byte budget, or None if a month alone is over"""
+        groups = []
+        for month, files in month_files:
+            size = cls._encoded_size(cls._attachment_parts(files, archive_name))
+            if size > Config.MAIL_ATTACHMENT_MAX_BYTES:
+                return None
+            if groups and groups[-1]['size'] + size <= Config.MAIL_ATTACHMENT_MAX_BYTES:
+                groups[-1]['months'].append(month)
+                groups[-1]['files'].extend(files)
+                groups[-1]['size'] += size
+            else:
+                groups.append({'months': [month], 'files': list(files), 'size': size})
         
-        output.seek(0)
-        return output.getvalue().encode('utf-8')
+        return [
+            (group['months'], cls._attachment_parts(group['files'], f"{archive_name}_{group['months'][-1]}_to_{group['months'][0]}"))
+            for group in groups
+        ]
     
     @classmethod
-    def _generate_excel_attachment(cls, data, filename):
-        """Generate Excel file from data"""
-        if not data:
-            return None
+    def _compose(cls, config, subject, body, files, archive_name, split_months=None):
+        """[(period suffix, message)] for a report, keeping each message's attachments within MAIL_ATTACHMENT_MAX_BYTES"""
+        parts = cls._attachment_parts(files, archive_name)
+        size = cls._encoded_size(parts)
+        if size <= Config.MAIL_ATTACHMENT_MAX_BYTES:
+            return [('', cls._message(config, subject, body, parts))]
         
-        df = pd.DataFrame(data)
-        output = io.BytesIO()
+        limit_mb = Config.MAIL_ATTACHMENT_MAX_BYTES / (1024 * 1024)
+        print(f"📦 {archive_name} attachments are {size / (1024 * 1024):.1f} MB, over the {limit_mb:.1f} MB budget")
         
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Visitors', index=False)
+        # Months arrive newest first, like the exports
+        groups = cls._split_by_month(split_months(), archive_name) if split_months and Config.MAIL_OVERSIZE_MODE == 'split' else None
+        if groups:
+            messages = []
+            for index, (months, group_parts) in enumerate(groups, 1):
+                section = (
+                    f'<h3>📎 Attachments (part {index} of {len(groups)})</h3>'
+                    f'<ul><li><strong>Months:</strong> {months[-1]} to {months[0]}</li></ul>'
+                )
+                messages.append((
+                    f'#{index}/{len(groups)}',
+                    cls._message(config, f'{subject} ({index}/{len(groups)})',
+                                 cls.ATTACHMENTS_SECTION.sub(section, body, count=1), group_parts)
+                ))
+            print(f"✂️ {archive_name} split into {len(messages)} message(s) by month")
+            return messages
         
-        output.seek(0)
-        return output.getvalue()
+        # Reduced: the zipped CSV alone, without the Excel copy of the same rows
+        csv_files = [(filename, data) for filename, data in files if filename.endswith('.csv')]
+        parts = cls._attachment_parts(csv_files, archive_name, zipped=True) if csv_files else []
+        if parts and cls._encoded_size(parts) <= Config.MAIL_ATTACHMENT_MAX_BYTES:
+            section = (
+                f'<h3>📎 Attachments</h3>'
+                f'<p>The data files exceed the {limit_mb:.1f} MB mail limit, so only the zipped CSV is attached. '
+                f'Export the period from the admin dashboard for the Excel file.</p>'
+            )
+            print(f"🗜️ {archive_name} sent with the zipped CSV only")
+            return [('', cls._message(config, subject, cls.ATTACHMENTS_SECTION.sub(section, body, count=1), parts))]
+        
+        # Summary only: a download link needs the single-host disk the dashboard is served from
+        if Config.EXPORT_CACHE_ENABLED:
+            key = ExportCache.put_artifact(cls._zip(files), 'application/zip', f'{archive_name}.zip')
+            where = f'Download them from the admin dashboard at <strong>/admin/report_artifacts/{key}</strong>.'
+            print(f"📝 {archive_name} sent as summary only; full data stored as {key}")
+        else:
+            where = 'Export the period from the admin dashboard instead.'
+            print(f"📝 {archive_name} sent as summary only")
+        section = (
+            f'<h3>📎 Attachments</h3>'
+            f'<p>The data files ({size / (1024 * 1024):.1f} MB) exceed the {limit_mb:.1f} MB mail limit and were not attached. {where}</p>'
+        )
+        return [('', cls._message(config, subject, cls.ATTACHMENTS_SECTION.sub(section, body, count=1), []))]
     
     @classmethod
-    def send_monthly_report(cls):
+    def send_monthly_report(cls, force=False):
         """Send monthly report email (previous month's data)"""
         try:
             if not cls._is_configured():
@@ -85,32 +204,25 @@ class EmailService:
             
             print(f"📊 Generating monthly report for {month_name} ({start_date} to {end_date})")
             
-            # Fetch visitors for the month
-            visitors = Database.get_visitors_by_date_range(start_date, end_date)
+            # A closed month is generated once and reused until a write touches it
+            snapshot = ReportSnapshots.get('students', start_date[:7])
+            stats = snapshot['stats']
             
-            if not visitors:
+            if not stats.total:
+                ReportSnapshots.release(snapshot)
                 print(f"⚠️ No data found for {month_name}, skipping email")
                 return False
             
-            # Generate attachments
-            csv_data = cls._generate_csv_attachment(visitors, f"monthly_report_{start_date}.csv")
-            excel_data = cls._generate_excel_attachment(visitors, f"monthly_report_{start_date}.xlsx")
-            
-            if not csv_data or not excel_data:
-                print("❌ Failed to generate attachments")
-                return False
-            
-            # Calculate statistics
-            jc_count = sum(1 for v in visitors if v.get('level') == 'JC')
-            ug_count = sum(1 for v in visitors if v.get('level') == 'UG')
-            pg_count = sum(1 for v in visitors if v.get('level') == 'PG')
-            active_count = sum(1 for v in visitors if v.get('exit_time') is None)
+            csv_data = ReportSnapshots.read_bytes(snapshot, 'csv')
+            excel_data = ReportSnapshots.read_bytes(snapshot, 'xlsx')
+            ReportSnapshots.release(snapshot)
             
-            # Create email
-            msg = MIMEMultipart()
-            msg['From'] = config['sender']
-            msg['To'] = config['recipient']
-            msg['Subject'] = f"📚 Library Monthly Report - {month_name}"
+            # Statistics
+            total_count = stats.total
+            jc_count = stats.levels.get('JC', 0)
+            ug_count = stats.levels.get('UG', 0)
+            pg_count = stats.levels.get('PG', 0)
+            active_count = stats.active
             
             # Email body
             body = f"""
@@ -140,7 +252,7 @@ class EmailService:
                 
                 <div class="stats">
                     <div class="stat-box">
-                        <div class="stat-number">{len(visitors)}</div>
+                        <div class="stat-number">{total_count}</div>
                         <div class="stat-label">Total Visitors</div>
                     </div>
                     <div class="stat-box">
@@ -163,8 +275,8 @@ class EmailService:
                 
                 <h3>📎 Attachments</h3>
                 <ul>
-                    <li><strong>CSV File:</strong> {len(visitors)} visitor records</li>
-                    <li><strong>Excel File:</strong> {len(visitors)} visitor records</li>
+                    <li><strong>CSV File:</strong> {total_count} visitor records</li>
+                    <li><strong>Excel File:</strong> {total_count} visitor records</li>
                 </ul>
                 
                 <div class="footer">
@@ -175,38 +287,25 @@ class EmailService:
             </html>
             """
             
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Attach CSV
-            csv_part = MIMEBase('application', 'octet-stream')
-            csv_part.set_payload(csv_data)
-            encoders.encode_base64(csv_part)
-            csv_part.add_header('Content-Disposition', f'attachment; filename=monthly_report_{start_date}.csv')
-            msg.attach(csv_part)
-            
-            # Attach Excel
-            excel_part = MIMEBase('application', 'octet-stream')
-            excel_part.set_payload(excel_data)
-            encoders.encode_base64(excel_part)
-            excel_part.add_header('Content-Disposition', f'attachment; filename=monthly_report_{start_date}.xlsx')
-            msg.attach(excel_part)
+            # Attachments are zipped and kept within the mail size budget (split or summary-only above it)
+            messages = cls._compose(
+                config, f"📚 Library Monthly Report - {month_name}", body,
+                [(f'monthly_report_{start_date}.csv', csv_data), (f'monthly_report_{start_date}.xlsx', excel_data)],
+                f'monthly_report_{start_date}'
+            )
             
-            # Send email
-            server = smtplib.SMTP(config['server'], config['port'])
-            server.starttls()
-            server.login(config['username'], config['password'])
-            server.send_message(msg)
-            server.quit()
+            # Queue for delivery (deduplicated per report period unless forced)
+            entry_ids = cls._deliver(messages, 'monthly', start_date[:7], force)
             
-            print(f"✅ Monthly report sent for {month_name} to {config['recipient']}")
-            return True
+            print(f"✅ Monthly report queued for {month_name} to {', '.join(config['recipients'])}")
+            return entry_ids
             
         except Exception as e:
             print(f"❌ Failed to send monthly report: {e}")
             return False
     
     @classmethod
-    def send_lifetime_report(cls):
+    def send_lifetime_report(cls, force=False):
         """Send lifetime report email (all data)"""
         try:
             if not cls._is_configured():
@@ -217,46 +316,24 @@ class EmailService:
             
             print("📊 Generating lifetime report")
             
-            # Fetch all visitors
-            visitors = Database.get_all_visitors()
+            # Closed months come from their snapshots; only the current month is fetched
+            stats, csv_data, excel_data = ReportSnapshots.lifetime('students')
             
-            if not visitors:
+            if not stats.total:
                 print("⚠️ No data found, skipping email")
                 return False
             
-            # Get unique dates for statistics
-            unique_dates = set()
-            for v in visitors:
-                if v.get('visit_date'):
-                    unique_dates.add(v['visit_date'])
-            
-            # Calculate statistics
-            jc_count = sum(1 for v in visitors if v.get('level') == 'JC')
-            ug_count = sum(1 for v in visitors if v.get('level') == 'UG')
-            pg_count = sum(1 for v in visitors if v.get('level') == 'PG')
-            active_count = sum(1 for v in visitors if v.get('exit_time') is None)
-            
-            # Get first and last visit dates
-            all_dates = [v.get('visit_date') for v in visitors if v.get('visit_date')]
-            first_visit = min(all_dates) if all_dates else 'N/A'
-            last_visit = max(all_dates) if all_dates else 'N/A'
+            # Statistics
+            total_count = stats.total
+            jc_count = stats.levels.get('JC', 0)
+            ug_count = stats.levels.get('UG', 0)
+            pg_count = stats.levels.get('PG', 0)
+            active_count = stats.active
+            first_visit = stats.first_date or 'N/A'
+            last_visit = stats.last_date or 'N/A'
+            avg_daily = stats.avg_daily
             
             today = datetime.now().strftime('%Y-%m-%d')
-            avg_daily = round(len(visitors) / len(unique_dates), 1) if unique_dates else 0
-            
-            # Generate attachments
-            csv_data = cls._generate_csv_attachment(visitors, f"lifetime_report_{today}.csv")
-            excel_data = cls._generate_excel_attachment(visitors, f"lifetime_report_{today}.xlsx")
-            
-            if not csv_data or not excel_data:
-                print("❌ Failed to generate attachments")
-                return False
-            
-            # Create email
-            msg = MIMEMultipart()
-            msg['From'] = config['sender']
-            msg['To'] = config['recipient']
-            msg['Subject'] = f"📚 Library Lifetime Report - {today}"
             
             # Email body
             body = f"""
@@ -282,12 +359,12 @@ class EmailService:
                 <div class="summary">
                     <h3>📅 Report Generated: {today}</h3>
                     <p><strong>Data Period:</strong> {first_visit} to {last_visit}</p>
-                    <p><strong>Total Days of Operation:</strong> {len(unique_dates)} days</p>
+                    <p><strong>Total Days of Operation:</strong> {stats.days} days</p>
                 </div>
                 
                 <div class="stats">
                     <div class="stat-box">
-                        <div class="stat-number">{len(visitors)}</div>
+                        <div class="stat-number">{total_count}</div>
                         <div class="stat-label">Total Visitors (All Time)</div>
                     </div>
                     <div class="stat-box">
@@ -314,8 +391,8 @@ class EmailService:
                 
                 <h3>📎 Attachments</h3>
                 <ul>
-                    <li><strong>CSV File:</strong> {len(visitors)} visitor records</li>
-                    <li><strong>Excel File:</strong> {len(visitors)} visitor records</li>
+                    <li><strong>CSV File:</strong> {total_count} visitor records</li>
+                    <li><strong>Excel File:</strong> {total_count} visitor records</li>
                 </ul>
                 
                 <div class="footer">
@@ -326,31 +403,22 @@ class EmailService:
             </html>
             """
             
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Attach CSV
-            csv_part = MIMEBase('application', 'octet-stream')
-            csv_part.set_payload(csv_data)
-            encoders.encode_base64(csv_part)
-            csv_part.add_header('Content-Disposition', f'attachment; filename=lifetime_report_{today}.csv')
-            msg.attach(csv_part)
+            # Attachments are zipped and kept within the mail size budget (split or summary-only above it)
+            messages = cls._compose(
+                config, f"📚 Library Lifetime Report - {today}", body,
+                [(f'lifetime_report_{today}.csv', csv_data), (f'lifetime_report_{today}.xlsx', excel_data)],
+                f'lifetime_report_{today}',
+                split_months=lambda: [
+                    (month, [(f'lifetime_report_{month}.csv', csv_month), (f'lifetime_report_{month}.xlsx', excel_month)])
+                    for month, csv_month, excel_month in ReportSnapshots.lifetime_months('students')
+                ]
+            )
             
-            # Attach Excel
-            excel_part = MIMEBase('application', 'octet-stream')
-            excel_part.set_payload(excel_data)
-            encoders.encode_base64(excel_part)
-            excel_part.add_header('Content-Disposition', f'attachment; filename=lifetime_report_{today}.xlsx')
-            msg.attach(excel_part)
+            # Queue for delivery (deduplicated per report period unless forced)
+            entry_ids = cls._deliver(messages, 'lifetime', today, force)
             
-            # Send email
-            server = smtplib.SMTP(config['server'], config['port'])
-            server.starttls()
-            server.login(config['username'], config['password'])
-            server.send_message(msg)
-            server.quit()
-            
-            print(f"✅ Lifetime report sent to {config['recipient']}")
-            return True
+            print(f"✅ Lifetime report queued for {', '.join(config['recipients'])}")
+            return entry_ids
             
         except Exception as e:
             print(f"❌ Failed to send lifetime report: {e}")
@@ -359,7 +427,7 @@ class EmailService:
     # ==================== NEW TEACHER REPORT FUNCTIONS ====================
     
     @classmethod
-    def send_monthly_report_teachers(cls):
+    def send_monthly_report_teachers(cls, force=False):
         """Send monthly teacher report email (previous month's data)"""
         try:
             if not cls._is_configured():
@@ -380,30 +448,23 @@ class EmailService:
             
             print(f"📊 Generating monthly teacher report for {month_name}")
             
-            # Fetch teachers for the month
-            teachers = Database.get_teachers_by_date_range(start_date, end_date)
+            # A closed month is generated once and reused until a write touches it
+            snapshot = ReportSnapshots.get('teachers', start_date[:7])
+            stats = snapshot['stats']
             
-            if not teachers:
+            if not stats.total:
+                ReportSnapshots.release(snapshot)
                 print(f"⚠️ No teacher data found for {month_name}")
                 return False
             
-            # Generate attachments
-            csv_data = cls._generate_csv_attachment(teachers, f"teachers_monthly_{start_date}.csv")
-            excel_data = cls._generate_excel_attachment(teachers, f"teachers_monthly_{start_date}.xlsx")
-            
-            if not csv_data or not excel_data:
-                print("❌ Failed to generate attachments")
-                return False
-            
-            # Calculate statistics
-            active_count = sum(1 for t in teachers if t.get('exit_time') is None)
-            unique_teachers = len(set(t.get('name', '') for t in teachers if t.get('name')))
+            csv_data = ReportSnapshots.read_bytes(snapshot, 'csv')
+            excel_data = ReportSnapshots.read_bytes(snapshot, 'xlsx')
+            ReportSnapshots.release(snapshot)
             
-            # Create email
-            msg = MIMEMultipart()
-            msg['From'] = config['sender']
-            msg['To'] = config['recipient']
-            msg['Subject'] = f"📚 Library Monthly Teacher Report - {month_name}"
+            # Statistics
+            total_count = stats.total
+            active_count = stats.active
+            unique_teachers = len(stats.names)
             
             body = f"""
             <html>
@@ -432,7 +493,7 @@ class EmailService:
                 
                 <div class="stats">
                     <div class="stat-box">
-                        <div class="stat-number">{len(teachers)}</div>
+                        <div class="stat-number">{total_count}</div>
                         <div class="stat-label">Total Teacher Visits</div>
                     </div>
                     <div class="stat-box">
@@ -447,8 +508,8 @@ class EmailService:
                 
                 <h3>📎 Attachments</h3>
                 <ul>
-                    <li><strong>CSV File:</strong> {len(teachers)} teacher records</li>
-                    <li><strong>Excel File:</strong> {len(teachers)} teacher records</li>
+                    <li><strong>CSV File:</strong> {total_count} teacher records</li>
+                    <li><strong>Excel File:</strong> {total_count} teacher records</li>
                 </ul>
                 
                 <div class="footer">
@@ -459,38 +520,25 @@ class EmailService:
             </html>
             """
             
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Attach CSV
-            csv_part = MIMEBase('application', 'octet-stream')
-            csv_part.set_payload(csv_data)
-            encoders.encode_base64(csv_part)
-            csv_part.add_header('Content-Disposition', f'attachment; filename=teachers_monthly_{start_date}.csv')
-            msg.attach(csv_part)
-            
-            # Attach Excel
-            excel_part = MIMEBase('application', 'octet-stream')
-            excel_part.set_payload(excel_data)
-            encoders.encode_base64(excel_part)
-            excel_part.add_header('Content-Disposition', f'attachment; filename=teachers_monthly_{start_date}.xlsx')
-            msg.attach(excel_part)
+            # Attachments are zipped and kept within the mail size budget (split or summary-only above it)
+            messages = cls._compose(
+                config, f"📚 Library Monthly Teacher Report - {month_name}", body,
+                [(f'teachers_monthly_{start_date}.csv', csv_data), (f'teachers_monthly_{start_date}.xlsx', excel_data)],
+                f'teachers_monthly_{start_date}'
+            )
             
-            # Send email
-            server = smtplib.SMTP(config['server'], config['port'])
-            server.starttls()
-            server.login(config['username'], config['password'])
-            server.send_message(msg)
-            server.quit()
+            # Queue for delivery (deduplicated per report period unless forced)
+            entry_ids = cls._deliver(messages, 'monthly_teachers', start_date[:7], force)
             
-            print(f"✅ Monthly teacher report sent for {month_name}")
-            return True
+            print(f"✅ Monthly teacher report queued for {month_name}")
+            return entry_ids
             
         except Exception as e:
             print(f"❌ Failed to send monthly teacher report: {e}")
             return False
     
     @classmethod
-    def send_lifetime_report_teachers(cls):
+    def send_lifetime_report_teachers(cls, force=False):
         """Send lifetime teacher report email (all teacher data)"""
         try:
             if not cls._is_configured():
@@ -501,44 +549,22 @@ class EmailService:
             
             print("📊 Generating lifetime teacher report")
             
-            # Fetch all teachers
-            teachers = Database.get_all_teachers()
+            # Closed months come from their snapshots; only the current month is fetched
+            stats, csv_data, excel_data = ReportSnapshots.lifetime('teachers')
             
-            if not teachers:
+            if not stats.total:
                 print("⚠️ No teacher data found")
                 return False
             
-            # Get unique dates for statistics
-            unique_dates = set()
-            for t in teachers:
-                if t.get('visit_date'):
-                    unique_dates.add(t['visit_date'])
-            
-            # Calculate statistics
-            unique_teachers = len(set(t.get('name', '') for t in teachers if t.get('name')))
-            active_count = sum(1 for t in teachers if t.get('exit_time') is None)
-            
-            # Get first and last visit dates
-            all_dates = [t.get('visit_date') for t in teachers if t.get('visit_date')]
-            first_visit = min(all_dates) if all_dates else 'N/A'
-            last_visit = max(all_dates) if all_dates else 'N/A'
+            # Statistics
+            total_count = stats.total
+            unique_teachers = len(stats.names)
+            active_count = stats.active
+            first_visit = stats.first_date or 'N/A'
+            last_visit = stats.last_date or 'N/A'
+            avg_daily = stats.avg_daily
             
             today = datetime.now().strftime('%Y-%m-%d')
-            avg_daily = round(len(teachers) / len(unique_dates), 1) if unique_dates else 0
-            
-            # Generate attachments
-            csv_data = cls._generate_csv_attachment(teachers, f"teachers_lifetime_{today}.csv")
-            excel_data = cls._generate_excel_attachment(teachers, f"teachers_lifetime_{today}.xlsx")
-            
-            if not csv_data or not excel_data:
-                print("❌ Failed to generate attachments")
-                return False
-            
-            # Create email
-            msg = MIMEMultipart()
-            msg['From'] = config['sender']
-            msg['To'] = config['recipient']
-            msg['Subject'] = f"📚 Library Lifetime Teacher Report - {today}"
             
             body = f"""
             <html>
@@ -563,12 +589,12 @@ class EmailService:
                 <div class="summary">
                     <h3>📅 Report Generated: {today}</h3>
                     <p><strong>Data Period:</strong> {first_visit} to {last_visit}</p>
-                    <p><strong>Total Days of Operation:</strong> {len(unique_dates)} days</p>
+                    <p><strong>Total Days of Operation:</strong> {stats.days} days</p>
                 </div>
                 
                 <div class="stats">
                     <div class="stat-box">
-                        <div class="stat-number">{len(teachers)}</div>
+                        <div class="stat-number">{total_count}</div>
                         <div class="stat-label">Total Teacher Visits</div>
                     </div>
                     <div class="stat-box">
@@ -580,7 +606,7 @@ class EmailService:
                         <div class="stat-label">Avg Daily Teachers</div>
                     </div>
                     <div class="stat-box">
-                        <div class="stat-number">{len(unique_dates)}</div>
+                        <div class="stat-number">{stats.days}</div>
                         <div class="stat-label">Days of Operation</div>
                     </div>
                     <div class="stat-box">
@@ -591,8 +617,8 @@ class EmailService:
                 
                 <h3>📎 Attachments</h3>
                 <ul>
-                    <li><strong>CSV File:</strong> {len(teachers)} teacher records</li>
-                    <li><strong>Excel File:</strong> {len(teachers)} teacher records</li>
+                    <li><strong>CSV File:</strong> {total_count} teacher records</li>
+                    <li><strong>Excel File:</strong> {total_count} teacher records</li>
                 </ul>
                 
                 <div class="footer">
@@ -603,32 +629,47 @@ class EmailService:
             </html>
             """
             
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Attach CSV
-            csv_part = MIMEBase('application', 'octet-stream')
-            csv_part.set_payload(csv_data)
-            encoders.encode_base64(csv_part)
-            csv_part.add_header('Content-Disposition', f'attachment; filename=teachers_lifetime_{today}.csv')
-            msg.attach(csv_part)
+            # Attachments are zipped and kept within the mail size budget (split or summary-only above it)
+            messages = cls._compose(
+                config, f"📚 Library Lifetime Teacher Report - {today}", body,
+                [(f'teachers_lifetime_{today}.csv', csv_data), (f'teachers_lifetime_{today}.xlsx', excel_data)],
+                f'teachers_lifetime_{today}',
+                split_months=lambda: [
+                    (month, [(f'teachers_lifetime_{month}.csv', csv_month), (f'teachers_lifetime_{month}.xlsx', excel_month)])
+                    for month, csv_month, excel_month in ReportSnapshots.lifetime_months('teachers')
+                ]
+            )
             
-            # Attach Excel
-            excel_part = MIMEBase('application', 'octet-stream')
-            excel_part.set_payload(excel_data)
-            encoders.encode_base64(excel_part)
-            excel_part.add_header('Content-Disposition', f'attachment; filename=teachers_lifetime_{today}.xlsx')
-            msg.attach(excel_part)
+            # Queue for delivery (deduplicated per report period unless forced)
+            entry_ids = cls._deliver(messages, 'lifetime_teachers', today, force)
             
-            # Send email
-            server = smtplib.SMTP(config['server'], config['port'])
-            server.starttls()
-            server.login(config['username'], config['password'])
-            server.send_message(msg)
-            server.quit()
-            
-            print(f"✅ Lifetime teacher report sent")
-            return True
+            print(f"✅ Lifetime teacher report queued")
+            return entry_ids
             
         except Exception as e:
             print(f"❌ Failed to send lifetime teacher report: {e}")
             return False
+    
+    # ==================== BATCHED DELIVERY ====================
+    
+    @classmethod
+    def send_batch(cls, names, progress=None, force=False):
+        """Generate several reports into the outbox; the worker sends them over one SMTP session"""
+        unknown = [name for name in names if name not in cls.REPORTS]
+        if unknown:
+            raise ValueError(f"Unknown report: {unknown[0]}")
+        if not cls._is_configured():
+            print("❌ Email not configured. Set MAIL_USERNAME, MAIL_PASSWORD, MAIL_RECIPIENT in .env")
+            return {'results': {name: False for name in names}, 'outbox_ids': {}}
+        
+        results, outbox_ids = {}, {}
+        for name in names:
+            entry_ids = getattr(cls, cls.REPORTS[name])(force=force)
+            results[name] = bool(entry_ids)
+            if entry_ids:
+                outbox_ids[name] = entry_ids
+            if progress:
+                progress(name, results[name])
+        
+        print(f"📬 Queued {sum(results.values())}/{len(names)} reports for delivery")
+        return {'results': results, 'outbox_ids': outbox_ids}
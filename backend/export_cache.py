@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from datetime import date, timedelta
+from backend.config import Config
+from backend.supabase_direct import SupabaseDirect as Database
+
+
+class ExportCache:
+    """Content-addressed disk cache for exports of date ranges that are already closed.
+
+    Data versions are a per-host file (versions.json), so the cache is only valid where every
+    worker shares one EXPORT_CACHE_DIR: the single-host gunicorn deployment. Config.EXPORT_CACHE_ENABLED
+    turns it off elsewhere (the default on Vercel), and exports are then always built fresh.
+    """
+
+    _lock = threading.Lock()
+
+    # ==================== DATA VERSIONS ====================
+
+    @classmethod
+    def _cache_dir(cls):
+        os.makedirs(Config.EXPORT_CACHE_DIR, exist_ok=True)
+        return Config.EXPORT_CACHE_DIR
+
+    @classmethod
+    def _versions_path(cls):
+        return os.path.join(cls._cache_dir(), 'versions.json')
+
+    @classmethod
+    def _load_versions(cls):
+        try:
+            with open(cls._versions_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _months(cls, start_date, end_date):
+        """'YYYY-MM' strings for every month touched by [start_date, end_date]"""
+        start = date.fromisoformat(start_date[:10]).replace(day=1)
+        end = date.fromisoformat(end_date[:10]).replace(day=1)
+        months = []
+        while start <= end:
+            months.append(start.strftime('%Y-%m'))
+            start = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return months
+
+    @classmethod
+    def data_version(cls, population, start_date, end_date):
+        """Version counters of every (population, month) a range depends on"""
+        versions = cls._load_versions()
+        populations = ['students', 'teachers'] if population in (None, '', 'all') else [population]
+        return {
+            f'{name}:{month}': versions.get(f'{name}:{month}', 0)
+            for name in populations
+            for month in cls._months(start_date, end_date)
+        }
+
+    @classmethod
+    def invalidate(cls, population, dates):
+        """Bump the data version of every month in `dates` after a write touched it"""
+        months = {str(d)[:7] for d in dates if d}
+        if not months or not Config.EXPORT_CACHE_ENABLED:
+            return
+        with cls._lock:
+            versions = cls._load_versions()
+            for month in months:
+                key = f'{population}:{month}'
+                versions[key] = versions.get(key, 0) + 1
+            tmp_path = f'{cls._versions_path()}.{uuid.uuid4().hex}'
+            with open(tmp_path, 'w') as f:
+                json.dump(versions, f)
+            os.replace(tmp_path, cls._versions_path())
+        print(f"🗑️ Export cache invalidated for {population}: {', '.join(sorted(months))}")
+
+    # ==================== LOOKUP / STORE ====================
+
+    @classmethod
+    def is_closed(cls, start_date, end_date):
+        """A range is cacheable once it ends before today (IST)"""
+        if not start_date or not end_date:
+            return False
+        today = Database._get_indian_time().date().isoformat()
+        return end_date[:10] < today
+
+    @classmethod
+    def key(cls, format_type, population, start_date, end_date):
+        """Content address of an export: parameters plus the data version they depend on"""
+        material = json.dumps([
+            format_type, population, start_date, end_date,
+            cls.data_version(population, start_date, end_date)
+        ], sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get_or_build(cls, format_type, population, start_date, end_date, build):
+        """Serve a closed range from disk, or build() it and store a copy while streaming"""
+        if not Config.EXPORT_CACHE_ENABLED or not cls.is_closed(start_date, end_date):
+            return build()
+
+        key = cls.key(format_type, population, start_date, end_date)
+        path = os.path.join(cls._cache_dir(), f'{key}.bin')
+        meta_path = os.path.join(cls._cache_dir(), f'{key}.json')
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            handle = open(path, 'rb')
+            os.utime(path)  # mark as recently used for LRU eviction
+            print(f"⚡ Export cache hit: {meta['download_name']}")
+            return cls._stream(handle), meta['mimetype'], meta['download_name']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        chunks, mimetype, download_name = build()
+        meta = {'mimetype': mimetype, 'download_name': download_name}
+        return cls._write_through(chunks, path, meta_path, meta), mimetype, download_name
+
+    @classmethod
+    def put_artifact(cls, data, mimetype, download_name):
+        """Store a finished artifact (e.g. a report too large to mail) for REPORT_ARTIFACT_TTL and return its key"""
+        os.makedirs(Config.REPORT_ARTIFACT_DIR, exist_ok=True)
+        cls.expire_artifacts()
+        key = hashlib.sha256(data).hexdigest()
+        path = os.path.join(Config.REPORT_ARTIFACT_DIR, f'{key}.bin')
+        part_path = f'{path}.{uuid.uuid4().hex}.part'
+        with open(part_path, 'wb') as f:
+            f.write(data)
+        with open(os.path.join(Config.REPORT_ARTIFACT_DIR, f'{key}.json'), 'w') as f:
+            json.dump({'mimetype': mimetype, 'download_name': download_name}, f)
+        os.replace(part_path, path)
+        return key
+
+    @classmethod
+    def get_artifact(cls, key):
+        """(chunks, mimetype, download_name) of an artifact stored with put_artifact(), or None once expired"""
+        if len(key) != 64 or any(c not in '0123456789abcdef' for c in key):
+            return None
+        try:
+            with open(os.path.join(Config.REPORT_ARTIFACT_DIR, f'{key}.json')) as f:
+                meta = json.load(f)
+            handle = open(os.path.join(Config.REPORT_ARTIFACT_DIR, f'{key}.bin'), 'rb')
+        except (OSError, ValueError):
+            return None
+        return cls._stream(handle), meta['mimetype'], meta['download_name']
+
+    @classmethod
+    def _stream(cls, handle):
+        with handle:
+            while True:
+                chunk = handle.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+
+    @classmethod
+    def _write_through(cls, chunks, path, meta_path, meta):
+        """Yield chunks to the client while copying them into the cache"""
+        part_path = f'{path}.{uuid.uuid4().hex}.part'
+        completed = False
+        try:
+            with open(part_path, 'wb') as part:
+                for chunk in chunks:
+                    part.write(chunk)
+                    yield chunk
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+            os.replace(part_path, path)
+            completed = True
+            cls.evict()
+        finally:
+            # Aborted downloads or failed builds never leave partial entries behind
+            if not completed and os.path.exists(part_path):
+                os.remove(part_path)
+
+    @classmethod
+    def expire_artifacts(cls):
+        """Remove stored artifacts older than REPORT_ARTIFACT_TTL (they are never LRU-evicted)"""
+        cutoff = time.time() - Config.REPORT_ARTIFACT_TTL
+        for name in os.listdir(Config.REPORT_ARTIFACT_DIR):
+            path = os.path.join(Config.REPORT_ARTIFACT_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    @classmethod
+    def evict(cls):
+        """Remove least recently used artifacts until the cache fits EXPORT_CACHE_MAX_BYTES"""
+        directory = cls._cache_dir()
+        with cls._lock:
+            entries = []
+            for name in os.listdir(directory):
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= Config.EXPORT_CACHE_MAX_BYTES:
+                    break
+                for victim in (path, path[:-len('.bin')] + '.json'):
+                    try:
+                        os.remove(victim)
+                    except OSError:
+                        pass
+                total -= size
@@ -0,0 +1,108 @@
+import os
+import time
+from urllib.parse import urlencode
+from backend.config import Config
+from backend.export_service import ExportService
+from backend.export_cache import ExportCache
+from backend.report_snapshots import ReportSnapshots
+from backend.job_queue import JobQueue
+
+
+class ExportJobs:
+    """Background export jobs that write their artifact (and status) to local disk shared by the host's workers"""
+
+    queue = JobQueue(
+        'export', Config.EXPORT_JOB_WORKERS, Config.EXPORT_JOB_MAX_PENDING,
+        state_dir=os.path.join(Config.EXPORT_JOB_DIR, 'jobs')
+    )
+
+    @classmethod
+    def _artifact_dir(cls):
+        os.makedirs(Config.EXPORT_JOB_DIR, exist_ok=True)
+        return Config.EXPORT_JOB_DIR
+
+    @classmethod
+    def submit(cls, format_type, population='all', start_date=None, end_date=None):
+        """Validate parameters and queue an export; raises ValueError or QueueFullError"""
+        if format_type not in ExportService.EXPORTERS:
+            raise ValueError(f"Invalid format: {format_type}")
+        ExportService.resolve_populations(population)
+
+        cls.cleanup()
+        params = {
+            'format': format_type,
+            'population': population,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+        return cls.queue.submit('export', cls._run, params)
+
+    @classmethod
+    def stream_url(cls, format_type, population='all', start_date=None, end_date=None):
+        """Validate parameters like submit() and return the equivalent streaming export URL"""
+        if format_type not in ExportService.EXPORTERS:
+            raise ValueError(f"Invalid format: {format_type}")
+        ExportService.resolve_populations(population)
+        params = {'format': format_type, 'population': population, 'start_date': start_date, 'end_date': end_date}
+        return '/admin/export_data?' + urlencode({k: v for k, v in params.items() if v})
+
+    @classmethod
+    def _run(cls, job):
+        """Write the export to disk while updating rows_processed / bytes_written"""
+        params = job.params
+        job.update(rows_processed=0, bytes_written=0)
+
+        def progress(rows):
+            job.increment(rows_processed=rows)
+
+        chunks, mimetype, download_name = ReportSnapshots.export(
+            params['format'], params['population'], params['start_date'], params['end_date']
+        ) or ExportCache.get_or_build(
+            params['format'], params['population'], params['start_date'], params['end_date'],
+            lambda: ExportService.build_export(
+                params['format'], params['population'], params['start_date'], params['end_date'], progress
+            )
+        )
+
+        path = os.path.join(cls._artifact_dir(), f'{job.id}_{download_name}')
+        with open(path + '.part', 'wb') as artifact:
+            for chunk in chunks:
+                artifact.write(chunk)
+                job.increment(bytes_written=len(chunk))
+        os.replace(path + '.part', path)
+
+        return {'path': path, 'mimetype': mimetype, 'download_name': download_name}
+
+    @classmethod
+    def get(cls, job_id):
+        return cls.queue.get(job_id)
+
+    @classmethod
+    def status(cls, job):
+        """Job status plus a download link once the artifact is ready"""
+        data = job.to_dict()
+        if job.status == 'done':
+            data['download_url'] = f'/admin/export_jobs/{job.id}/download'
+        return data
+
+    @classmethod
+    def cleanup(cls):
+        """Drop finished jobs and artifacts older than EXPORT_JOB_TTL"""
+        def remove_artifact(job):
+            if job.result and os.path.exists(job.result['path']):
+                os.remove(job.result['path'])
+
+        removed = cls.queue.purge(Config.EXPORT_JOB_TTL, remove_artifact)
+
+        # Artifacts left behind by a previous process are no longer tracked
+        cutoff = time.time() - Config.EXPORT_JOB_TTL
+        directory = cls._artifact_dir()
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
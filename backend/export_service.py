@@ -0,0 +1,392 @@
+import io
+import csv
+import zipfile
+import tempfile
+from datetime import datetime, date, time
+from backend.config import Config
+from backend.supabase_direct import SupabaseDirect as Database
+
+
+class _ChunkSink:
+    """Write-only file object that collects bytes until a generator drains them"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _DictionaryEncoder:
+    """Growing value -> index map so every batch's dictionary extends the previous one"""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def encode(self, values):
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            if value not in self._index:
+                self._index[value] = len(self.values)
+                self.values.append(value)
+            indices.append(self._index[value])
+        return indices
+
+
+class ExportService:
+    """Streaming exports of student and teacher visit records"""
+
+    POPULATIONS = ('students', 'teachers')
+    CHUNK_SIZE = 64 * 1024
+    XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+    ARROW_MIMETYPE = 'application/vnd.apache.arrow.file'
+
+    STUDENT_HEADERS = ['ID', 'Name', 'Roll No', 'Level', 'Course/Stream', 'Year', 'Purpose', 'Entry Time', 'Exit Time', 'Visit Date', 'Day']
+    TEACHER_HEADERS = ['ID', 'Name', 'Employee ID', 'Designation', 'Nature of Work', 'Purpose', 'Notes', 'Entry Time', 'Exit Time', 'Visit Date', 'Day']
+
+    # ==================== ROW FORMATTING ====================
+
+    @classmethod
+    def student_row(cls, v):
+        """Format a visitor record as an export row"""
+        if v.get('level') == 'JC':
+            course_val = v.get('jc_stream', '')
+            year_val = v.get('jc_year', '')
+        else:
+            course_val = v.get('course', '')
+            year_val = v.get('year', '')
+
+        return [
+            v.get('id', ''),
+            v.get('name', ''),
+            v.get('roll_no', ''),
+            v.get('level', ''),
+            course_val,
+            year_val,
+            v.get('purpose', ''),
+            str(v.get('entry_time', '')),
+            str(v.get('exit_time', '')),
+            str(v.get('visit_date', '')),
+            v.get('visit_day', '')
+        ]
+
+    @classmethod
+    def teacher_row(cls, t):
+        """Format a teacher record as an export row"""
+        return [
+            t.get('id', ''),
+            t.get('name', ''),
+            t.get('employee_id', ''),
+            t.get('designation', ''),
+            t.get('nature_of_work', ''),
+            t.get('purpose', ''),
+            t.get('notes', ''),
+            str(t.get('entry_time', '')),
+            str(t.get('exit_time', '')),
+            str(t.get('visit_date', '')),
+            t.get('visit_day', '')
+        ]
+
+    @classmethod
+    def get_population(cls, population):
+        """Return (headers, row formatter, page reader) for a population"""
+        if population == 'students':
+            return cls.STUDENT_HEADERS, cls.student_row, Database.iter_visitors
+        if population == 'teachers':
+            return cls.TEACHER_HEADERS, cls.teacher_row, Database.iter_teachers
+        raise ValueError(f"Unknown population: {population}")
+
+    @classmethod
+    def resolve_populations(cls, population):
+        """Expand the `population` request argument into a list of populations"""
+        if not population or population == 'all':
+            return list(cls.POPULATIONS)
+        if population in cls.POPULATIONS:
+            return [population]
+        raise ValueError(f"Unknown population: {population}")
+
+    @classmethod
+    def iter_rows(cls, population, start_date=None, end_date=None, progress=None):
+        """Yield pages of formatted export rows as they arrive from Supabase"""
+        headers, row_fn, reader = cls.get_population(population)
+        for page in reader(start_date, end_date):
+            rows = [row_fn(r) for r in page]
+            if progress:
+                progress(len(rows))
+            yield rows
+
+    # ==================== CSV / ZIP STREAMS ====================
+
+    @classmethod
+    def prefetch(cls, pages):
+        """Fetch the first page now, so an upstream failure raises before the response starts"""
+        pages = iter(pages)
+        first = next(pages, None)
+
+        def chained():
+            if first is not None:
+                yield first
+            yield from pages
+        return chained()
+
+    @classmethod
+    def stream_csv(cls, population, start_date=None, end_date=None, progress=None):
+        """CSV bytes for one population, one upstream page at a time (first page fetched eagerly)"""
+        pages = cls.prefetch(cls.iter_rows(population, start_date, end_date, progress))
+        return cls._csv_chunks(cls.get_population(population)[0], pages)
+
+    @classmethod
+    def _csv_chunks(cls, headers, pages):
+        # An upstream error after this point propagates out of the generator: the server then
+        # drops the connection mid-body instead of completing a truncated file
+        text = io.StringIO()
+        writer = csv.writer(text)
+        writer.writerow(headers)
+
+        for rows in pages:
+            writer.writerows(rows)
+            yield text.getvalue().encode('utf-8')
+            text.seek(0)
+            text.truncate(0)
+
+        if text.tell():
+            yield text.getvalue().encode('utf-8')
+
+    @classmethod
+    def stream_zip(cls, members, compression=zipfile.ZIP_DEFLATED):
+        """Yield a ZIP archive of (name, chunk iterator) members without buffering it"""
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, 'w', compression) as zip_file:
+            for name, chunks in members:
+                with zip_file.open(name, 'w', force_zip64=True) as entry:
+                    for chunk in chunks:
+                        entry.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+        yield sink.drain()
+
+    @classmethod
+    def csv_export(cls, population='all', start_date=None, end_date=None, progress=None):
+        """Return (chunk iterator, mimetype, download name) for a CSV export"""
+        stamp = datetime.now().strftime("%Y%m%d")
+        populations = cls.resolve_populations(population)
+
+        if len(populations) == 1:
+            chunks = cls.stream_csv(populations[0], start_date, end_date, progress)
+            return chunks, 'text/csv', f'{populations[0]}_{stamp}.csv'
+
+        members = [
+            (f'{name}_{stamp}.csv', cls.stream_csv(name, start_date, end_date, progress))
+            for name in populations
+        ]
+        return cls.stream_zip(members), 'application/zip', f'library_export_{stamp}.zip'
+
+    # ==================== XLSX (WRITE-ONLY) ====================
+
+    @classmethod
+    def write_xlsx(cls, fileobj, sheets):
+        """Write (title, headers, row pages) sheets with openpyxl's write-only workbook"""
+        from openpyxl import Workbook  # imported on first export, not at startup
+        workbook = Workbook(write_only=True)
+        for title, headers, pages in sheets:
+            worksheet = workbook.create_sheet(title)
+            worksheet.append(headers)
+            for rows in pages:
+                for row in rows:
+                    worksheet.append(row)
+        workbook.save(fileobj)
+
+    @classmethod
+    def stream_file(cls, fileobj):
+        """Yield a file object's contents in fixed-size chunks, closing it afterwards"""
+        try:
+            fileobj.seek(0)
+            while True:
+                chunk = fileobj.read(cls.CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            fileobj.close()
+
+    @classmethod
+    def xlsx_export(cls, population='all', start_date=None, end_date=None, progress=None):
+        """Return (chunk iterator, mimetype, download name) for an Excel export"""
+        stamp = datetime.now().strftime("%Y%m%d")
+        populations = cls.resolve_populations(population)
+
+        sheets = [
+            (name.capitalize(), cls.get_population(name)[0], cls.iter_rows(name, start_date, end_date, progress))
+            for name in populations
+        ]
+        spool = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_BYTES)
+        cls.write_xlsx(spool, sheets)
+
+        name = populations[0] if len(populations) == 1 else 'library_export'
+        return cls.stream_file(spool), cls.XLSX_MIMETYPE, f'{name}_{stamp}.xlsx'
+
+    # ==================== PARQUET / ARROW ====================
+
+    # (column, kind) pairs; 'category' columns are dictionary-encoded
+    COLUMNAR_FIELDS = {
+        'students': [
+            ('id', 'int'), ('name', 'string'), ('roll_no', 'string'), ('level', 'category'),
+            ('course', 'category'), ('year', 'category'), ('purpose', 'category'),
+            ('entry_time', 'time'), ('exit_time', 'time'), ('visit_date', 'date'), ('visit_day', 'category')
+        ],
+        'teachers': [
+            ('id', 'int'), ('name', 'string'), ('employee_id', 'string'), ('designation', 'category'),
+            ('nature_of_work', 'category'), ('purpose', 'category'), ('notes', 'string'),
+            ('entry_time', 'time'), ('exit_time', 'time'), ('visit_date', 'date'), ('visit_day', 'category')
+        ]
+    }
+
+    @classmethod
+    def _import_pyarrow(cls):
+        """Import pyarrow on demand - it is an optional dependency"""
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet/Arrow export requires the 'pyarrow' package")
+        return pyarrow
+
+    @classmethod
+    def _arrow_type(cls, pa, kind):
+        """Map a COLUMNAR_FIELDS kind to an Arrow type"""
+        return {
+            'int': pa.int64(),
+            'string': pa.string(),
+            'category': pa.dictionary(pa.int32(), pa.string()),
+            'time': pa.time32('s'),
+            'date': pa.date32()
+        }[kind]
+
+    @classmethod
+    def _convert_value(cls, value, kind):
+        """Convert a Supabase JSON value to the Python type Arrow expects"""
+        if value is None or value == '':
+            return None
+        if kind == 'int':
+            return int(value)
+        if kind == 'time':
+            return time.fromisoformat(str(value)).replace(microsecond=0)
+        if kind == 'date':
+            return date.fromisoformat(str(value)[:10])
+        return str(value)
+
+    @classmethod
+    def _columnar_record(cls, population, record):
+        """Pick the typed columns for a population out of a raw record"""
+        if population == 'students':
+            record = dict(record)
+            if record.get('level') == 'JC':
+                record['course'] = record.get('jc_stream')
+                record['year'] = record.get('jc_year')
+        return [cls._convert_value(record.get(name), kind) for name, kind in cls.COLUMNAR_FIELDS[population]]
+
+    @classmethod
+    def write_columnar(cls, fileobj, format_type, population, start_date=None, end_date=None, progress=None):
+        """Write one population as Parquet row groups or Arrow IPC record batches"""
+        pa = cls._import_pyarrow()
+        fields = cls.COLUMNAR_FIELDS[population]
+        schema = pa.schema([(name, cls._arrow_type(pa, kind)) for name, kind in fields])
+        encoders = {name: _DictionaryEncoder() for name, kind in fields if kind == 'category'}
+        reader = cls.get_population(population)[2]
+
+        if format_type == 'parquet':
+            writer = pa.parquet.ParquetWriter(fileobj, schema, compression='snappy')
+        else:
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            writer = pa.ipc.new_file(fileobj, schema, options=options)
+
+        def write_batch(records):
+            columns = []
+            for position, (name, kind) in enumerate(fields):
+                values = [record[position] for record in records]
+                if kind == 'category':
+                    encoder = encoders[name]
+                    indices = pa.array(encoder.encode(values), type=pa.int32())
+                    columns.append(pa.DictionaryArray.from_arrays(indices, pa.array(encoder.values, type=pa.string())))
+                else:
+                    columns.append(pa.array(values, type=cls._arrow_type(pa, kind)))
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+
+        try:
+            pending = []
+            for page in reader(start_date, end_date):
+                pending.extend(cls._columnar_record(population, record) for record in page)
+                if progress:
+                    progress(len(page))
+                # One row group / record batch per EXPORT_ROW_GROUP_SIZE rows keeps memory bounded
+                if len(pending) >= Config.EXPORT_ROW_GROUP_SIZE:
+                    write_batch(pending)
+                    pending = []
+            if pending:
+                write_batch(pending)
+        finally:
+            writer.close()
+
+    @classmethod
+    def columnar_export(cls, format_type, population='all', start_date=None, end_date=None, progress=None):
+        """Return (chunk iterator, mimetype, download name) for a Parquet or Arrow export"""
+        stamp = datetime.now().strftime("%Y%m%d")
+        populations = cls.resolve_populations(population)
+        extension = 'parquet' if format_type == 'parquet' else 'arrow'
+        mimetype = cls.PARQUET_MIMETYPE if format_type == 'parquet' else cls.ARROW_MIMETYPE
+
+        files = []
+        for name in populations:
+            spool = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_BYTES)
+            cls.write_columnar(spool, format_type, name, start_date, end_date, progress)
+            files.append((f'{name}_{stamp}.{extension}', spool))
+
+        if len(files) == 1:
+            return cls.stream_file(files[0][1]), mimetype, files[0][0]
+
+        # Parquet/Arrow are already compressed or binary - store them as-is
+        members = ((name, cls.stream_file(spool)) for name, spool in files)
+        return cls.stream_zip(members, zipfile.ZIP_STORED), 'application/zip', f'library_export_{stamp}.zip'
+
+    @classmethod
+    def parquet_export(cls, population='all', start_date=None, end_date=None, progress=None):
+        """Parquet export with typed date/time columns and dictionary-encoded categories"""
+        return cls.columnar_export('parquet', population, start_date, end_date, progress)
+
+    @classmethod
+    def arrow_export(cls, population='all', start_date=None, end_date=None, progress=None):
+        """Arrow IPC file export with the same schema as the Parquet export"""
+        return cls.columnar_export('arrow', population, start_date, end_date, progress)
+
+    # ==================== DISPATCH ====================
+
+    EXPORTERS = {
+        'csv': 'csv_export',
+        'excel': 'xlsx_export',
+        'parquet': 'parquet_export',
+        'arrow': 'arrow_export'
+    }
+
+    @classmethod
+    def build_export(cls, format_type, population='all', start_date=None, end_date=None, progress=None):
+        """Return (chunk iterator, mimetype, download name) for any supported format"""
+        exporter = cls.EXPORTERS.get(format_type)
+        if not exporter:
+            raise ValueError(f"Invalid format: {format_type}")
+        return getattr(cls, exporter)(population, start_date, end_date, progress)
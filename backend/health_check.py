@@ -0,0 +1,23 @@
+import time
+import threading
+from backend.config import Config
+from backend.supabase_direct import SupabaseDirect as Database
+
+
+class HealthCheck:
+    """Deep (upstream) health check, cached so probes and /test-db cannot hammer Supabase"""
+
+    _lock = threading.Lock()
+    _result = None
+    _checked_at = 0.0
+
+    @classmethod
+    def deep(cls):
+        """Supabase reachability and table access; refreshed at most every HEALTH_CHECK_TTL seconds"""
+        with cls._lock:
+            age = time.time() - cls._checked_at
+            if cls._result is None or age >= Config.HEALTH_CHECK_TTL:
+                cls._result = Database.ping(timeout=Config.HEALTH_CHECK_TIMEOUT)
+                cls._checked_at = time.time()
+                age = 0.0
+            return dict(cls._result, cached=age > 0, age_seconds=round(age, 1))
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+from backend.config import Config
+from backend.import_service import ImportService
+from backend.export_cache import ExportCache
+from backend.job_queue import Job, JobQueue
+
+
+class ImportJobs:
+    """Background imports that checkpoint every committed chunk to disk"""
+
+    queue = JobQueue('import', Config.IMPORT_JOB_WORKERS, Config.IMPORT_JOB_MAX_PENDING)
+    _state_lock = threading.RLock()
+    _heartbeat = None
+
+    # ==================== CHECKPOINT STATE ====================
+
+    @classmethod
+    def _job_dir(cls, job_id):
+        if not job_id.isalnum():
+            raise ValueError("Invalid job id")
+        return os.path.join(Config.IMPORT_JOB_DIR, job_id)
+
+    @classmethod
+    def _save(cls, job, report):
+        """Persist job status and the resumable report atomically, stamped with this process's heartbeat"""
+        state = job.to_dict()
+        state['report'] = dict(report, dates=sorted(report['dates']))
+        state['owner_pid'] = os.getpid()
+        state['heartbeat'] = time.time()
+        cls._write(job.id, state)
+
+    @classmethod
+    def _write(cls, job_id, state):
+        path = os.path.join(cls._job_dir(job_id), 'state.json')
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with cls._state_lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def _load(cls, job_id):
+        try:
+            with open(os.path.join(cls._job_dir(job_id), 'state.json')) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        state['report']['dates'] = set(state['report']['dates'])
+        return state
+
+    @classmethod
+    def _is_stale(cls, state):
+        """No checkpoint or heartbeat from the owning worker within IMPORT_JOB_HEARTBEAT_TIMEOUT"""
+        return time.time() - state.get('heartbeat', 0) > Config.IMPORT_JOB_HEARTBEAT_TIMEOUT
+
+    @classmethod
+    def _beat(cls):
+        """Refresh the heartbeat of every unfinished job this process holds (queued ones included)"""
+        while True:
+            time.sleep(Config.IMPORT_JOB_HEARTBEAT_TIMEOUT / 4)
+            for job in cls.queue.list():
+                if job.finished:
+                    continue
+                with cls._state_lock:
+                    state = cls._load(job.id)
+                    if state and state.get('owner_pid') == os.getpid() and state['status'] in ('queued', 'running'):
+                        state['report']['dates'] = sorted(state['report']['dates'])
+                        state['heartbeat'] = time.time()
+                        cls._write(job.id, state)
+
+    @classmethod
+    def _start_heartbeat(cls):
+        with cls._state_lock:
+            if cls._heartbeat is None:
+                cls._heartbeat = threading.Thread(target=cls._beat, name='import-heartbeat', daemon=True)
+                cls._heartbeat.start()
+
+    @classmethod
+    @contextmanager
+    def _claim(cls, job_id):
+        """Exclusive across workers while a resume decides and records the new owner"""
+        path = os.path.join(cls._job_dir(job_id), 'resume.lock')
+        try:
+            if time.time() - os.path.getmtime(path) > Config.IMPORT_JOB_HEARTBEAT_TIMEOUT:
+                os.remove(path)  # left behind by a worker that died mid-resume
+        except OSError:
+            pass
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            raise ValueError("Import job is already being resumed")
+        try:
+            yield
+        finally:
+            os.remove(path)
+
+    @classmethod
+    def _progress(cls, report, throughput=0):
+        return {
+            'rows_read': report['rows_read'],
+            'inserted': report['inserted'],
+            'duplicates': report['duplicates'],
+            'rejected': report['rejected'],
+            'chunks_committed': report['chunks_committed'],
+            'rows_per_second': throughput
+        }
+
+    # ==================== JOB LIFECYCLE ====================
+
+    @classmethod
+    def submit(cls, upload):
+        """Save an uploaded file to disk and queue its import"""
+        if not ImportService.is_supported(upload.filename):
+            raise ValueError("Unsupported file format")
+
+        cls.cleanup()
+        job = Job('import', {'filename': upload.filename})
+        os.makedirs(cls._job_dir(job.id), exist_ok=True)
+        upload.save(os.path.join(cls._job_dir(job.id), 'upload'))
+
+        report = ImportService.new_report()
+        job.update(**cls._progress(report))
+        cls._save(job, report)
+        cls._start_heartbeat()
+        return cls.queue.submit('import', cls._run, job.params, job=job)
+
+    @classmethod
+    def resume(cls, job_id):
+        """Re-queue a failed or interrupted import from its last checkpoint"""
+        job = cls.queue.get(job_id)
+        if job and not job.finished:
+            raise ValueError("Import job is still running")
+        if not cls._load(job_id):
+            raise LookupError("Import job not found")
+
+        with cls._claim(job_id):
+            state = cls._load(job_id)
+            if state['status'] == 'done':
+                raise ValueError("Import job already finished")
+            if state['status'] in ('queued', 'running') and not cls._is_stale(state):
+                # Another worker owns it and is still checkpointing; a second run would insert duplicates
+                raise ValueError("Import job is still running in another worker")
+
+            if not job:
+                # The process that ran it is gone - rebuild the job from its checkpoint
+                job = Job('import', state['params'])
+                job.id = job_id
+                job.created_at = state['created_at']
+            job.update(**cls._progress(state['report']))
+            job.status = 'queued'
+            cls._save(job, state['report'])  # take ownership before any other worker can claim it
+            try:
+                job = cls.queue.submit('import', cls._run, job.params, job=job)
+            except Exception:
+                state['report']['dates'] = sorted(state['report']['dates'])
+                cls._write(job_id, state)
+                raise
+        cls._start_heartbeat()
+        return job
+
+    @classmethod
+    def _run(cls, job):
+        report = cls._load(job.id)['report']
+        started = time.time()
+        rows_at_start = report['rows_read']
+
+        def on_chunk(report, chunk_dates):
+            ExportCache.invalidate('students', chunk_dates)
+            elapsed = time.time() - started
+            throughput = round((report['rows_read'] - rows_at_start) / elapsed, 1) if elapsed else 0
+            job.update(**cls._progress(report, throughput))
+            cls._save(job, report)
+
+        job.status = 'running'
+        cls._save(job, report)
+        try:
+            with open(os.path.join(cls._job_dir(job.id), 'upload'), 'rb') as upload:
+                ImportService.import_file(upload, job.params['filename'], report, on_chunk)
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = time.time()
+            cls._save(job, report)
+            raise
+
+        job.status = 'done'
+        job.finished_at = time.time()
+        cls._save(job, report)
+        return {'errors': report['errors']}
+
+    @classmethod
+    def status(cls, job_id):
+        """Live status, or the last checkpoint for jobs another worker (or a dead one) owns"""
+        job = cls.queue.get(job_id)
+        state = cls._load(job_id)
+        if not state:
+            return None
+
+        data = job.to_dict() if job else {k: v for k, v in state.items() if k != 'report'}
+        if not job and data['status'] in ('queued', 'running') and cls._is_stale(state):
+            data['status'] = 'interrupted'
+        data['errors'] = state['report']['errors']
+        if state['report'].get('failure'):
+            data['failure'] = state['report']['failure']
+        data['resumable'] = data['status'] in ('failed', 'interrupted')
+        return data
+
+    @classmethod
+    def cleanup(cls):
+        """Remove job directories (upload + checkpoint) older than IMPORT_JOB_TTL"""
+        if not os.path.isdir(Config.IMPORT_JOB_DIR):
+            return
+        cls.queue.purge(Config.IMPORT_JOB_TTL)
+        cutoff = time.time() - Config.IMPORT_JOB_TTL
+        for job_id in os.listdir(Config.IMPORT_JOB_DIR):
+            path = os.path.join(Config.IMPORT_JOB_DIR, job_id)
+            running = cls.queue.get(job_id)
+            if running and not running.finished:
+                continue
+            try:
+                if os.path.getmtime(os.path.join(path, 'state.json')) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
@@ -0,0 +1,300 @@
+import gzip
+import zipfile
+from datetime import date, datetime, time
+from backend.config import Config
+from backend.supabase_direct import SupabaseDirect as Database
+
+# pandas and openpyxl are imported inside the methods that use them: together they
+# add over half a second to every cold start, and most requests never import a file.
+
+class ImportService:
+    """Chunked visitor import: stream the upload, validate columns vectorized, bulk insert"""
+
+    REQUIRED_COLUMNS = ['name', 'roll_no', 'level', 'purpose']
+    ALLOWED_LEVELS = ['JC', 'UG', 'PG']
+    JC_YEARS = ['FYJC', 'SYJC']
+    JC_STREAMS = ['Science', 'Arts', 'Commerce']
+    SUPPORTED_EXTENSIONS = ('.csv', '.csv.gz', '.xlsx', '.xlsm', '.zip')
+    ZIP_MEMBER_EXTENSIONS = ('.csv', '.csv.gz', '.xlsx', '.xlsm')
+
+    # Every inserted object carries the same keys (PostgREST bulk insert requirement)
+    INSERT_COLUMNS = [
+        'name', 'roll_no', 'level', 'course', 'purpose', 'year', 'jc_year', 'jc_stream',
+        'visit_date', 'visit_day', 'entry_time', 'exit_time'
+    ]
+
+    # A visit is the same visit when these match, whichever file (or kiosk) it came from
+    DEDUP_KEY = ['roll_no', 'visit_date', 'entry_time', 'level']
+
+    # ==================== READERS ====================
+
+    @classmethod
+    def is_supported(cls, filename):
+        """Whether iter_chunks can read this upload"""
+        return filename.lower().endswith(cls.SUPPORTED_EXTENSIONS)
+
+    @classmethod
+    def iter_chunks(cls, fileobj, filename, chunk_size=None):
+        """Yield DataFrame chunks of string cells without loading the whole file"""
+        import pandas as pd
+        chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+        name = filename.lower()
+
+        if name.endswith('.csv'):
+            yield from pd.read_csv(fileobj, dtype=str, chunksize=chunk_size)
+        elif name.endswith('.csv.gz'):
+            # Decompressed incrementally as read_csv pulls bytes
+            with gzip.GzipFile(fileobj=fileobj, mode='rb') as stream:
+                yield from pd.read_csv(stream, dtype=str, chunksize=chunk_size)
+        elif name.endswith(('.xlsx', '.xlsm')):
+            yield from cls._iter_xlsx_chunks(fileobj, chunk_size)
+        elif name.endswith('.zip'):
+            yield from cls._iter_zip_chunks(fileobj, chunk_size)
+        else:
+            raise ValueError("Unsupported file format")
+
+    @classmethod
+    def _iter_zip_chunks(cls, fileobj, chunk_size):
+        """Stream every importable member of a zip archive, in name order"""
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile:
+            raise ValueError("Invalid zip archive")
+
+        with archive:
+            members = sorted(
+                info.filename for info in archive.infolist()
+                if not info.is_dir()
+                and not info.filename.startswith('__MACOSX/')
+                and info.filename.lower().endswith(cls.ZIP_MEMBER_EXTENSIONS)
+            )
+            if not members:
+                raise ValueError("Zip archive contains no CSV or Excel files")
+
+            for member in members:
+                # Members are decompressed on the fly; nothing is extracted to memory or disk
+                with archive.open(member) as stream:
+                    try:
+                        for chunk in cls.iter_chunks(stream, member, chunk_size):
+                            chunk.attrs['source'] = member
+                            yield chunk
+                    except ValueError as e:
+                        # Parse errors name the line, not the member it is in
+                        raise ValueError(f"{member}: {e}") from e
+
+    @classmethod
+    def _cell_to_str(cls, value):
+        """Render an openpyxl cell value the way it would appear in a CSV"""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.date().isoformat() if value.time() == time() else value.isoformat(sep=' ')
+        if isinstance(value, (date, time)):
+            return value.isoformat()
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @classmethod
+    def _iter_xlsx_chunks(cls, fileobj, chunk_size):
+        """Read the first sheet with openpyxl's read-only mode, chunk_size rows at a time"""
+        from openpyxl import load_workbook
+        import pandas as pd
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [cls._cell_to_str(cell) or '' for cell in next(rows, ())]
+            width = len(header)
+            batch = []
+            for row in rows:
+                cells = [cls._cell_to_str(cell) for cell in row[:width]]
+                if not any(cells):
+                    continue
+                batch.append(cells + [None] * (width - len(cells)))
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=header, dtype=object)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header, dtype=object)
+        finally:
+            workbook.close()
+
+    # ==================== VALIDATION ====================
+
+    @classmethod
+    def _clean(cls, df, column):
+        """Stripped string column with blanks as NA (all-NA if the column is absent)"""
+        import pandas as pd
+        if column not in df.columns:
+            return pd.Series(pd.NA, index=df.index, dtype=object)
+        series = df[column].astype('string').str.strip()
+        return series.mask(series == '').astype(object)
+
+    @classmethod
+    def _parse_times(cls, series):
+        """Vectorized HH:MM[:SS] parsing; returns (HH:MM:SS strings, invalid mask)"""
+        import pandas as pd
+        parsed = pd.to_datetime(series, format='%H:%M:%S', errors='coerce')
+        parsed = parsed.fillna(pd.to_datetime(series, format='%H:%M', errors='coerce'))
+        invalid = series.notna() & parsed.isna()
+        return parsed.dt.strftime('%H:%M:%S').astype(object).where(parsed.notna(), None), invalid
+
+    @classmethod
+    def validate_chunk(cls, df, now=None):
+        """Normalize a chunk; returns (valid records, [(row index, error)])"""
+        import pandas as pd
+        df = df.rename(columns=lambda c: str(c).strip().lower())
+        missing = [col for col in cls.REQUIRED_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required column: {missing[0]}")
+
+        now = now or Database._get_indian_time()
+        out = pd.DataFrame(index=df.index)
+        out['name'] = cls._clean(df, 'name')
+        out['roll_no'] = cls._clean(df, 'roll_no').str.upper()
+        out['level'] = cls._clean(df, 'level').str.upper()
+        out['purpose'] = cls._clean(df, 'purpose')
+        out['course'] = cls._clean(df, 'course').fillna('Not Specified')
+
+        is_jc = out['level'] == 'JC'
+        out['jc_year'] = cls._clean(df, 'jc_year').str.upper().where(is_jc, None)
+        out['jc_stream'] = cls._clean(df, 'jc_stream').str.title().where(is_jc, None)
+        out['year'] = cls._clean(df, 'year').where(~is_jc, None)
+
+        # Rows without a visit date are stamped with the current IST time, like kiosk entries
+        visit_date = pd.to_datetime(cls._clean(df, 'visit_date'), format='%Y-%m-%d', errors='coerce')
+        bad_date = cls._clean(df, 'visit_date').notna() & visit_date.isna()
+        stamped = cls._clean(df, 'visit_date').isna()
+        visit_date = visit_date.fillna(pd.Timestamp(now.date()))
+        out['visit_date'] = visit_date.dt.strftime('%Y-%m-%d')
+        out['visit_day'] = visit_date.dt.day_name()
+
+        entry_time, bad_entry = cls._parse_times(cls._clean(df, 'entry_time'))
+        out['entry_time'] = entry_time.where(~stamped | entry_time.notna(), now.strftime('%H:%M:%S'))
+        out['exit_time'], bad_exit = cls._parse_times(cls._clean(df, 'exit_time'))
+
+        # First failing rule wins, checked in the same order as the kiosk form
+        errors = pd.Series('', index=df.index, dtype=object)
+        rules = [(out[col].isna(), f"{col} is required") for col in cls.REQUIRED_COLUMNS]
+        rules += [
+            (~out['level'].isin(cls.ALLOWED_LEVELS), f"level must be one of {', '.join(cls.ALLOWED_LEVELS)}"),
+            (is_jc & (out['jc_year'].isna() | out['jc_stream'].isna()), "JC Year and Stream are required for JC students"),
+            (is_jc & out['jc_year'].notna() & ~out['jc_year'].isin(cls.JC_YEARS), f"jc_year must be one of {', '.join(cls.JC_YEARS)}"),
+            (is_jc & out['jc_stream'].notna() & ~out['jc_stream'].isin(cls.JC_STREAMS), f"jc_stream must be one of {', '.join(cls.JC_STREAMS)}"),
+            (bad_date, "visit_date must be YYYY-MM-DD"),
+            (bad_entry | bad_exit, "entry_time/exit_time must be HH:MM[:SS]"),
+            (out['entry_time'].isna(), "entry_time is required when visit_date is given")
+        ]
+        for mask, message in rules:
+            errors = errors.mask((errors == '') & mask.fillna(True).astype(bool), message)
+
+        valid = out[errors == ''][cls.INSERT_COLUMNS].astype(object)
+        valid = valid.where(valid.notna(), None)
+        rejected = [(index, message) for index, message in errors[errors != ''].items()]
+        return valid, rejected
+
+    # ==================== DE-DUPLICATION ====================
+
+    @classmethod
+    def _key(cls, row):
+        """Normalized dedup key of a stored visitor row"""
+        return (
+            str(row.get('roll_no') or '').strip().upper(),
+            str(row.get('visit_date') or '')[:10],
+            str(row.get('entry_time') or '')[:8],
+            str(row.get('level') or '').strip().upper()
+        )
+
+    @classmethod
+    def _prefetch_keys(cls, dates, existing, covered):
+        """Load stored keys for the span of dates not fetched yet, one paged projected query"""
+        import pandas as pd
+        missing = sorted(set(dates) - covered)
+        if not missing:
+            return
+        for page in Database.iter_visitor_keys(missing[0], missing[-1]):
+            existing.update(cls._key(row) for row in page)
+        span = pd.date_range(missing[0], missing[-1]).strftime('%Y-%m-%d')
+        covered.update(span)
+
+    @classmethod
+    def drop_duplicates(cls, valid, existing, covered):
+        """Remove in-chunk duplicates and rows already stored; returns (new rows, duplicate count)"""
+        import pandas as pd
+        if not len(valid):
+            return valid, 0
+        cls._prefetch_keys(valid['visit_date'].unique(), existing, covered)
+
+        keys = list(zip(*(valid[col].fillna('') for col in cls.DEDUP_KEY)))
+        in_file = valid.duplicated(subset=cls.DEDUP_KEY)
+        stored = pd.Series([key in existing for key in keys], index=valid.index)
+        fresh = valid[~(in_file | stored)]
+        return fresh, len(valid) - len(fresh)
+
+    # ==================== PIPELINE ====================
+
+    @classmethod
+    def new_report(cls):
+        """Empty progress/result record; also serves as a resumable checkpoint"""
+        return {
+            'rows_read': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0,
+            'chunks_committed': 0, 'errors': [], 'dates': set()
+        }
+
+    @classmethod
+    def import_file(cls, fileobj, filename, report=None, on_chunk=None):
+        """Run the pipeline, resuming after report['chunks_committed'] chunks when given a checkpoint"""
+        report = report or cls.new_report()
+        report.pop('failure', None)
+        now = Database._get_indian_time()
+        offset = 0
+        existing, covered = set(), set()  # stored dedup keys and the dates they were fetched for
+        source = None
+
+        next_row = 1  # first data row of the current file not yet committed
+        try:
+            for chunk_index, chunk in enumerate(cls.iter_chunks(fileobj, filename)):
+                if chunk.attrs.get('source') != source:
+                    # Row numbers restart for each file inside an archive
+                    source, offset, next_row = chunk.attrs.get('source'), 0, 1
+                chunk.index = range(offset + 1, offset + 1 + len(chunk))  # 1-based data row numbers
+                offset += len(chunk)
+                if chunk_index < report['chunks_committed']:
+                    next_row = offset + 1
+                    continue
+
+                chunk_dates = set()
+                valid, rejected = cls.validate_chunk(chunk, now)
+                valid, duplicates = cls.drop_duplicates(valid, existing, covered)
+                report['duplicates'] += duplicates
+                if len(valid):
+                    if not Database.insert_visitors_bulk(valid.to_dict('records')):
+                        # Not a row error: the checkpoint stays on this chunk so a resume retries
+                        # it (de-duplication skips whatever part of it did land)
+                        raise Exception(f"Bulk insert of {len(valid)} rows failed")
+                    report['inserted'] += len(valid)
+                    existing.update(zip(*(valid[col].fillna('') for col in cls.DEDUP_KEY)))
+                    chunk_dates = set(valid['visit_date'].unique())
+                    report['dates'].update(chunk_dates)
+
+                report['rows_read'] += len(chunk)
+                report['rejected'] += len(rejected)
+                room = Config.IMPORT_ERROR_LIMIT - len(report['errors'])
+                for index, message in rejected[:max(room, 0)]:
+                    error = {'row': int(index), 'error': message}
+                    if source:
+                        error['file'] = source
+                    report['errors'].append(error)
+                report['chunks_committed'] = chunk_index + 1
+                # Checkpoint hook: the chunk is committed upstream at this point
+                if on_chunk:
+                    on_chunk(report, chunk_dates)
+                next_row = offset + 1
+        except Exception as e:
+            # Chunks before this one stay committed; record where the import stopped
+            report['failure'] = {'row': next_row, 'error': str(e).strip()}
+            if source:
+                report['failure']['file'] = source
+            raise
+
+        return report
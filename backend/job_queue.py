@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when a queue already holds its maximum number of unfinished jobs"""
+
+
+class Job:
+    """A unit of background work with progress counters"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def update(self, **values):
+        """Set progress counters"""
+        with self._lock:
+            self.progress.update(values)
+
+    def increment(self, **deltas):
+        """Add to progress counters"""
+        with self._lock:
+            for key, delta in deltas.items():
+                self.progress[key] = self.progress.get(key, 0) + delta
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a job from a snapshot persisted by JobQueue (to_dict() plus its result)"""
+        job = cls(data['kind'], data['params'])
+        job.id = data['job_id']
+        job.status = data['status']
+        job.progress = data['progress']
+        job.result = data.get('result')
+        job.error = data['error']
+        job.created_at = data['created_at']
+        job.started_at = data['started_at']
+        job.finished_at = data['finished_at']
+        return job
+
+    def to_dict(self):
+        """JSON-friendly snapshot of the job"""
+        with self._lock:
+            progress = dict(self.progress)
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': self.params,
+            'progress': progress,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed_seconds': elapsed
+        }
+
+
+class JobQueue:
+    """Bounded thread pool that runs jobs and keeps their status in memory.
+
+    With a state_dir, every job is also written to {state_dir}/{id}.json (on each transition and
+    every HEARTBEAT_INTERVAL while it runs), so any worker sharing that directory can answer a poll.
+    """
+
+    HEARTBEAT_INTERVAL = 2
+    # An unfinished job whose snapshot is older than this belongs to a worker that died
+    STALE_AFTER = 60
+
+    def __init__(self, name, max_workers, max_pending, state_dir=None):
+        self.name = name
+        self.max_pending = max_pending
+        self.state_dir = state_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+        self._heartbeat = None
+
+    def submit(self, kind, fn, params, job=None):
+        """Queue fn(job) and return the Job; raises QueueFullError when saturated"""
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Too many {self.name} jobs in progress ({pending}), try again later")
+            job = job or Job(kind, params)
+            job.status = 'queued'
+            self._jobs[job.id] = job
+        self._persist(job)
+        self._start_heartbeat()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        """The live job, or (with a state_dir) a snapshot of one another worker ran"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job or self._load(job_id)
+
+    def list(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def purge(self, max_age, on_remove=None):
+        """Forget finished jobs (and persisted snapshots) older than max_age seconds"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            expired = [j for j in self._jobs.values() if j.finished and j.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            if on_remove:
+                on_remove(job)
+
+        if self.state_dir and os.path.isdir(self.state_dir):
+            for name in os.listdir(self.state_dir):
+                path = os.path.join(self.state_dir, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+        return len(expired)
+
+    def _run(self, job, fn):
+        job.status = 'running'
+        job.started_at = time.time()
+        job.error = None
+        try:
+            self._persist(job)
+            job.result = fn(job)
+            job.status = 'done'
+            print(f"✅ {self.name} job {job.id} finished")
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            print(f"❌ {self.name} job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._persist(job)
+
+    # ==================== SHARED STATE ====================
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f'{job_id}.json')
+
+    def _persist(self, job):
+        """Write the job's snapshot atomically (no-op without a state_dir)"""
+        if not self.state_dir:
+            return
+        with self._persist_lock:
+            data = job.to_dict()
+            data['result'] = job.result
+            data['heartbeat'] = time.time()
+            os.makedirs(self.state_dir, exist_ok=True)
+            tmp_path = f'{self._state_path(job.id)}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._state_path(job.id))
+
+    def _load(self, job_id):
+        if not self.state_dir or not job_id.isalnum():
+            return None
+        try:
+            with open(self._state_path(job_id)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = Job.from_dict(data)
+        if not job.finished and time.time() - data['heartbeat'] > self.STALE_AFTER:
+            job.status = 'failed'
+            job.error = 'The worker running this job stopped before it finished'
+        return job
+
+    def _beat(self):
+        """Keep the snapshots (and progress) of this worker's unfinished jobs fresh"""
+        while True:
+            time.sleep(self.HEARTBEAT_INTERVAL)
+            for job in self.list():
+                if not job.finished:
+                    try:
+                        self._persist(job)
+                    except OSError as e:
+                        print(f"⚠️ {self.name} job {job.id} state not saved: {e}")
+
+    def _start_heartbeat(self):
+        if not self.state_dir:
+            return
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name=f'{self.name}-heartbeat', daemon=True)
+                self._heartbeat.start()
@@ -0,0 +1,280 @@
+import os
+import time
+import email
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+from backend.config import Config
+from backend.smtp_session import SMTPSession
+
+
+class MailOutbox:
+    """SQLite-backed outbox: reports are queued here and a worker delivers them with backoff"""
+
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _worker = None
+    _config_fn = None
+    _ready = False
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dedup_key TEXT NOT NULL,
+            report TEXT NOT NULL,
+            period TEXT NOT NULL,
+            subject TEXT,
+            message BLOB NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            claimed_at REAL,
+            last_error TEXT,
+            send_seconds REAL,
+            connect_seconds REAL,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+        CREATE INDEX IF NOT EXISTS outbox_dedup ON outbox (dedup_key);
+    '''
+
+    # Entries stuck in 'sending' this long belong to a worker that died
+    CLAIM_TIMEOUT = 600
+
+    # ==================== STORAGE ====================
+
+    @classmethod
+    @contextmanager
+    def _db(cls):
+        """Connection that commits on success and is always closed"""
+        if not cls._ready:
+            directory = os.path.dirname(Config.MAIL_OUTBOX_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(Config.MAIL_OUTBOX_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not cls._ready:
+                conn.executescript(cls.SCHEMA)
+                columns = {row['name'] for row in conn.execute("PRAGMA table_info(outbox)")}
+                if 'connect_seconds' not in columns:  # outbox files created before login timing was kept
+                    conn.execute("ALTER TABLE outbox ADD COLUMN connect_seconds REAL")
+                cls._ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @classmethod
+    def _entry(cls, row):
+        return {
+            'id': row['id'],
+            'report': row['report'],
+            'period': row['period'],
+            'subject': row['subject'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'next_attempt_at': row['next_attempt_at'] if row['status'] == 'pending' else None,
+            'last_error': row['last_error'],
+            'send_seconds': row['send_seconds'],
+            'connect_seconds': row['connect_seconds'],
+            'created_at': row['created_at'],
+            'sent_at': row['sent_at']
+        }
+
+    @classmethod
+    def enqueue(cls, report, period, msg, force=False):
+        """Queue msg once per (report, period); returns (entry id, queued?)"""
+        dedup_key = f'{report}:{period}'
+        now = time.time()
+        with cls._lock, cls._db() as conn:
+            existing = conn.execute(
+                "SELECT id, status FROM outbox WHERE dedup_key = ? AND status != 'dead' ORDER BY id DESC LIMIT 1",
+                (dedup_key,)
+            ).fetchone()
+            # A forced resend still never stacks a second copy behind one that is waiting
+            if existing and (not force or existing['status'] in ('pending', 'sending')):
+                print(f"📭 {report} for {period} already {existing['status']} (outbox #{existing['id']})")
+                return existing['id'], False
+
+            cursor = conn.execute(
+                "INSERT INTO outbox (dedup_key, report, period, subject, message, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (dedup_key, report, period, msg['Subject'], msg.as_bytes(), now, now)
+            )
+            entry_id = cursor.lastrowid
+        print(f"📥 Queued {report} for {period} (outbox #{entry_id})")
+        cls.wake()
+        return entry_id, True
+
+    @classmethod
+    def get(cls, entry_ids):
+        """Outbox entries by id, in the given order"""
+        if not entry_ids:
+            return []
+        with cls._db() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM outbox WHERE id IN ({','.join('?' * len(entry_ids))})", list(entry_ids)
+            ).fetchall()
+        by_id = {row['id']: cls._entry(row) for row in rows}
+        return [by_id[entry_id] for entry_id in entry_ids if entry_id in by_id]
+
+    @classmethod
+    def status(cls, limit=50):
+        """Counts per status plus the most recent entries"""
+        with cls._db() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            rows = conn.execute("SELECT * FROM outbox ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return {'counts': counts, 'entries': [cls._entry(row) for row in rows]}
+
+    @classmethod
+    def retry(cls, entry_id):
+        """Put a dead entry back in the queue with a fresh attempt budget"""
+        with cls._lock, cls._db() as conn:
+            updated = conn.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                "WHERE id = ? AND status = 'dead'",
+                (time.time(), entry_id)
+            ).rowcount
+        if updated:
+            cls.wake()
+        return bool(updated)
+
+    # ==================== DELIVERY ====================
+
+    @classmethod
+    def _backoff(cls, attempts):
+        """Exponential backoff with jitter, capped at MAIL_OUTBOX_MAX_BACKOFF"""
+        delay = min(Config.MAIL_OUTBOX_BACKOFF * (2 ** (attempts - 1)), Config.MAIL_OUTBOX_MAX_BACKOFF)
+        return delay * random.uniform(0.8, 1.2)
+
+    @classmethod
+    def _claim_due(cls):
+        """Mark every due entry as 'sending' and return them"""
+        now = time.time()
+        with cls._lock, cls._db() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # other processes' workers wait instead of double-claiming
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE (status = 'pending' AND next_attempt_at <= ?) "
+                "OR (status = 'sending' AND claimed_at < ?) ORDER BY id",
+                (now, now - cls.CLAIM_TIMEOUT)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                [(now, row['id']) for row in rows]
+            )
+        return rows
+
+    @classmethod
+    def _mark(cls, row, error=None, delivery=None):
+        now = time.time()
+        with cls._lock, cls._db() as conn:
+            if error is None:
+                conn.execute(
+                    "UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = ?, "
+                    "send_seconds = ?, connect_seconds = ?, last_error = NULL WHERE id = ?",
+                    (now, delivery['seconds'], delivery['connect_seconds'], row['id'])
+                )
+                return
+            attempts = row['attempts'] + 1
+            if attempts >= Config.MAIL_OUTBOX_MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, row['id'])
+                )
+                print(f"☠️ Outbox #{row['id']} gave up after {attempts} attempts: {error}")
+            else:
+                retry_at = now + cls._backoff(attempts)
+                conn.execute(
+                    "UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, retry_at, error, row['id'])
+                )
+                print(f"🔁 Outbox #{row['id']} attempt {attempts} failed, retrying in {retry_at - now:.0f}s: {error}")
+
+    @classmethod
+    def deliver_due(cls):
+        """Send every due entry over one SMTP session; returns the number sent"""
+        rows = cls._claim_due()
+        if not rows:
+            return 0
+
+        sent = 0
+        session = SMTPSession(cls._config_fn())
+        try:
+            for row in rows:
+                try:
+                    session.send(email.message_from_bytes(row['message']))
+                except Exception as e:
+                    cls._mark(row, error=str(e))
+                    if session.connections == 0:
+                        # Could not even log in: the rest of the batch would fail the same way
+                        for other in rows[rows.index(row) + 1:]:
+                            cls._mark(other, error=str(e))
+                        break
+                    continue
+                cls._mark(row, delivery=session.deliveries[-1])
+                sent += 1
+        finally:
+            session.close()
+        timing = session.timing()
+        print(f"📬 Outbox delivered {sent}/{len(rows)} message(s) over {timing['connections']} login(s) "
+              f"(connect {timing['connect_seconds']:.2f}s, send {timing['send_seconds']:.2f}s)")
+        return sent
+
+    @classmethod
+    def deliver_now(cls, entry_ids, timeout):
+        """Deliver due entries inside the calling request, waiting at most `timeout` seconds.
+
+        For callers on serverless hosts (vercel.json): the instance may freeze once the
+        response is sent and /tmp belongs to that instance alone, so the background worker
+        cannot be relied on. Returns the current state of entry_ids.
+        """
+        def deliver():
+            try:
+                cls.deliver_due()
+            except Exception as e:
+                print(f"❌ Outbox delivery error: {e}")
+
+        sender = threading.Thread(target=deliver, name='mail-outbox-inline', daemon=True)
+        sender.start()
+        sender.join(timeout)
+        return cls.get(entry_ids)
+
+    @classmethod
+    def _next_due_in(cls):
+        with cls._db() as conn:
+            row = conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        if row[0] is None:
+            return Config.MAIL_OUTBOX_POLL_INTERVAL
+        return max(0, min(row[0] - time.time(), Config.MAIL_OUTBOX_POLL_INTERVAL))
+
+    @classmethod
+    def _run_worker(cls):
+        while True:
+            cls._wake.clear()
+            try:
+                cls.deliver_due()
+                timeout = cls._next_due_in()
+            except Exception as e:
+                print(f"❌ Outbox worker error: {e}")
+                timeout = Config.MAIL_OUTBOX_POLL_INTERVAL
+            if cls._wake.wait(timeout):
+                # Let the rest of a report batch land so it shares one SMTP session
+                time.sleep(Config.MAIL_OUTBOX_LINGER)
+
+    @classmethod
+    def start(cls, config_fn):
+        """Start the background sender (once per process); config_fn returns the SMTP config"""
+        with cls._lock:
+            cls._config_fn = config_fn
+            if cls._worker and cls._worker.is_alive():
+                return
+            cls._worker = threading.Thread(target=cls._run_worker, name='mail-outbox', daemon=True)
+            cls._worker.start()
+
+    @classmethod
+    def wake(cls):
+        """Nudge the worker to look for due entries now"""
+        cls._wake.set()
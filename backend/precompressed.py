@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+from flask import Response
+from backend.config import Config
+
+try:
+    import brotli  # optional: br variants are only stored when the package is installed
+except ImportError:
+    brotli = None
+
+
+class PrecompressedPage:
+    """A body rendered once and kept as identity/gzip/br variants with ETags"""
+
+    # Preferred first when the client accepts several
+    ENCODINGS = ('br', 'gzip')
+
+    def __init__(self, body, mimetype='text/html', max_age=None, immutable=False, compressed=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.mimetype = mimetype
+        self.max_age = Config.PAGE_CACHE_MAX_AGE if max_age is None else max_age
+        self.immutable = immutable
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+
+        # compressed: variants built ahead of time (e.g. by the asset build), used as-is
+        self.variants = {'identity': body}
+        if compressed is None:
+            compressed = self.compress(body)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                self.variants[encoding] = data
+
+    @staticmethod
+    def compress(body):
+        """{'gzip': bytes, 'br': bytes} at maximum compression (br only with the brotli package)"""
+        compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(body, quality=11)
+        return compressed
+
+    def etag(self, encoding):
+        """Strong ETag per representation; all variants share the content digest"""
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def _choose(self, accept_encoding):
+        """Best stored encoding the client accepts (q=0 means refused)"""
+        accepted = set()
+        for item in (accept_encoding or '').lower().split(','):
+            name, _, params = item.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(name.strip())
+        for encoding in self.ENCODINGS:
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+    def response(self, request):
+        """200 with the best variant, or 304 when the client already holds this content"""
+        encoding = self._choose(request.headers.get('Accept-Encoding'))
+        headers = {
+            'ETag': self.etag(encoding),
+            'Cache-Control': f'public, max-age={self.max_age}' + (', immutable' if self.immutable else ''),
+            'Vary': 'Accept-Encoding'
+        }
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match.strip() == '*' or any(
+            tag.strip().lstrip('W/').strip('"').split('-')[0] == self.digest
+            for tag in if_none_match.split(',')
+        ):
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.variants[encoding], mimetype=self.mimetype, headers=headers)
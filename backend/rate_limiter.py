@@ -0,0 +1,149 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+from backend.config import Config
+
+
+class RateLimiter:
+    """Token buckets per client and per (client, route), with an in-flight cap for load shedding"""
+
+    _lock = threading.Lock()
+    _buckets = {}  # key -> (tokens, updated)
+    _in_flight = 0
+    _takes = 0
+    _rules = None
+    _kiosk_endpoints = frozenset()
+    _db_ready = False
+    _stats = {'allowed': 0, 'rejected': 0, 'shed': 0, 'rejected_by_rule': {}}
+
+    # Every this many takes, buckets idle long enough to be full again are forgotten
+    PRUNE_EVERY = 1024
+
+    # ==================== RULES ====================
+
+    @classmethod
+    def _parse(cls, spec):
+        """'rate/burst' -> (tokens per second, bucket size)"""
+        rate, burst = spec.split('/')
+        return float(rate), float(burst)
+
+    @classmethod
+    def rules(cls):
+        """{'client': ..., 'kiosk': ..., '<endpoint>': (rate, burst), ...} from the RATE_LIMIT_* settings"""
+        if cls._rules is None:
+            rules = {'client': cls._parse(Config.RATE_LIMIT_CLIENT), 'kiosk': cls._parse(Config.RATE_LIMIT_KIOSK)}
+            for item in Config.RATE_LIMIT_ROUTES.split(';'):
+                if '=' in item:
+                    endpoint, spec = item.split('=', 1)
+                    rules[endpoint.strip()] = cls._parse(spec.strip())
+            cls._kiosk_endpoints = frozenset(name.strip() for name in Config.RATE_LIMIT_KIOSK_ENDPOINTS.split(','))
+            cls._rules = rules
+        return cls._rules
+
+    # ==================== BUCKETS ====================
+
+    @classmethod
+    def _refill(cls, state, rate, burst, now):
+        tokens, updated = state if state else (burst, now)
+        return min(burst, tokens + (now - updated) * rate)
+
+    @classmethod
+    def _take_memory(cls, key, rate, burst, now):
+        with cls._lock:
+            tokens = cls._refill(cls._buckets.get(key), rate, burst, now)
+            allowed = tokens >= 1
+            cls._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            cls._takes += 1
+            if cls._takes % cls.PRUNE_EVERY == 0:
+                cls._prune(now)
+        return allowed, tokens
+
+    @classmethod
+    def _prune(cls, now):
+        """Drop buckets idle long enough to have refilled completely (lock held)"""
+        longest = max(burst / rate for rate, burst in cls.rules().values() if rate > 0)
+        for key in [k for k, (_, updated) in cls._buckets.items() if now - updated > longest]:
+            del cls._buckets[key]
+
+    @classmethod
+    def _take_sqlite(cls, key, rate, burst, now):
+        """Same bucket shared by every worker process on this host"""
+        if not cls._db_ready:
+            directory = os.path.dirname(Config.RATE_LIMIT_DB_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(Config.RATE_LIMIT_DB_PATH, timeout=5, isolation_level=None)
+        try:
+            if not cls._db_ready:
+                conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+                cls._db_ready = True
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = cls._refill(row, rate, burst, now)
+            allowed = tokens >= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens - 1 if allowed else tokens, now)
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return allowed, tokens
+
+    @classmethod
+    def _take(cls, key, rate, burst):
+        """(allowed, seconds until a token is available)"""
+        now = time.time()
+        take = cls._take_sqlite if Config.RATE_LIMIT_BACKEND == 'sqlite' else cls._take_memory
+        try:
+            allowed, tokens = take(key, rate, burst, now)
+        except sqlite3.Error as e:
+            # A broken shared store must not take the site down with it
+            print(f"⚠️ Rate limiter store error, falling back to memory: {e}")
+            allowed, tokens = cls._take_memory(key, rate, burst, now)
+        if allowed:
+            return True, 0
+        return False, (1 - tokens) / rate if rate > 0 else 60
+
+    # ==================== REQUEST HOOKS ====================
+
+    @classmethod
+    def check(cls, client, endpoint):
+        """None if the request may proceed, else (status, rule, retry_after seconds)"""
+        rules = cls.rules()
+        bucket = 'kiosk' if endpoint in cls._kiosk_endpoints else 'client'
+        checks = [(bucket, f'{bucket}:{client}')]
+        if endpoint in rules:
+            checks.append((endpoint, f'route:{endpoint}:{client}'))
+
+        for rule, key in checks:
+            allowed, retry_after = cls._take(key, *rules[rule])
+            if not allowed:
+                with cls._lock:
+                    cls._stats['rejected'] += 1
+                    cls._stats['rejected_by_rule'][rule] = cls._stats['rejected_by_rule'].get(rule, 0) + 1
+                return 429, rule, max(1, math.ceil(retry_after))
+
+        with cls._lock:
+            if Config.RATE_LIMIT_MAX_IN_FLIGHT and cls._in_flight >= Config.RATE_LIMIT_MAX_IN_FLIGHT:
+                cls._stats['shed'] += 1
+                return 503, 'in_flight', 1
+            cls._in_flight += 1
+            cls._stats['allowed'] += 1
+        return None
+
+    @classmethod
+    def release(cls):
+        """End of a request admitted by check()"""
+        with cls._lock:
+            cls._in_flight = max(0, cls._in_flight - 1)
+
+    @classmethod
+    def metrics(cls):
+        """Admission, rejection and shedding counters for /admin/metrics"""
+        with cls._lock:
+            stats = dict(cls._stats, rejected_by_rule=dict(cls._stats['rejected_by_rule']))
+            stats.update(in_flight=cls._in_flight, tracked_buckets=len(cls._buckets), backend=Config.RATE_LIMIT_BACKEND)
+        return stats
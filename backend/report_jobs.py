@@ -0,0 +1,79 @@
+import time
+from backend.config import Config
+from backend.email_service import EmailService
+from backend.mail_outbox import MailOutbox
+from backend.job_queue import Job, JobQueue
+
+
+class ReportJobs:
+    """Background generation and delivery of emailed reports, with status shared by the host's workers"""
+
+    queue = JobQueue(
+        'report', Config.REPORT_JOB_WORKERS, Config.REPORT_JOB_MAX_PENDING, state_dir=Config.REPORT_JOB_DIR
+    )
+
+    @classmethod
+    def _check(cls, names):
+        unknown = [name for name in names if name not in EmailService.REPORTS]
+        if unknown:
+            raise ValueError(f"Unknown report: {unknown[0]}")
+
+    @classmethod
+    def submit(cls, names):
+        """Queue one batch of reports (sent over one SMTP session); raises ValueError or QueueFullError"""
+        cls._check(names)
+        cls.queue.purge(Config.REPORT_JOB_TTL)
+        return cls.queue.submit('report', cls._run, {'reports': list(names)})
+
+    @classmethod
+    def run_inline(cls, names):
+        """Generate and deliver a batch inside the request, for hosts without background jobs.
+
+        Delivery waits at most MAIL_TRIGGER_TIMEOUT, like the cron trigger; returns status() of the run.
+        """
+        cls._check(names)
+        job = Job('report', {'reports': list(names)})
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = cls._run(job)
+            entry_ids = [entry_id for ids in job.result['outbox_ids'].values() for entry_id in ids]
+            MailOutbox.deliver_now(entry_ids, Config.MAIL_TRIGGER_TIMEOUT)
+            job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            print(f"❌ Inline report run failed: {e}")
+        finally:
+            job.finished_at = time.time()
+        return cls.status(job)
+
+    @classmethod
+    def _run(cls, job):
+        names = job.params['reports']
+        job.update(reports_total=len(names), reports_queued=0, current=names[0])
+
+        def progress(name, queued):
+            job.increment(reports_queued=int(queued))
+            remaining = names[names.index(name) + 1:]
+            job.update(current=remaining[0] if remaining else None)
+
+        # Sends requested from the dashboard are deliberate, so they bypass per-period dedup
+        batch = EmailService.send_batch(names, progress, force=True)
+        if not any(batch['results'].values()):
+            raise Exception("No report was generated (no data for the period or email not configured)")
+        return batch
+
+    @classmethod
+    def get(cls, job_id):
+        return cls.queue.get(job_id)
+
+    @classmethod
+    def status(cls, job):
+        """Job status plus per-report results and their outbox delivery state"""
+        data = job.to_dict()
+        if job.result:
+            data.update(job.result)
+            entry_ids = [entry_id for ids in job.result['outbox_ids'].values() for entry_id in ids]
+            data['delivery'] = MailOutbox.get(entry_ids)
+        return data
@@ -0,0 +1,316 @@
+import os
+import io
+import csv
+import json
+import glob
+import uuid
+import shutil
+import calendar
+import tempfile
+import threading
+from datetime import date
+from backend.config import Config
+from backend.supabase_direct import SupabaseDirect as Database
+from backend.export_service import ExportService
+from backend.export_cache import ExportCache
+from backend.report_stats import ReportStats
+
+
+class ReportSnapshots:
+    """Immutable per-(population, month) report artifacts: stats plus CSV/XLSX files.
+
+    Snapshots are named by ExportCache data versions, so they are reused only when
+    Config.EXPORT_CACHE_ENABLED; otherwise every get() builds a throwaway copy that the
+    caller hands back to release().
+    """
+
+    _lock = threading.Lock()
+
+    # ==================== KEYS ====================
+
+    @classmethod
+    def months_between(cls, first_date, last_date):
+        """'YYYY-MM' months from first_date's month through last_date's month"""
+        year, number = int(first_date[:4]), int(first_date[5:7])
+        months = []
+        while f'{year:04d}-{number:02d}' <= last_date[:7]:
+            months.append(f'{year:04d}-{number:02d}')
+            year, number = (year + 1, 1) if number == 12 else (year, number + 1)
+        return months
+
+    @classmethod
+    def month_range(cls, month):
+        """('YYYY-MM-01', 'YYYY-MM-<last>') for a 'YYYY-MM' month"""
+        year, number = (int(part) for part in month.split('-'))
+        last_day = calendar.monthrange(year, number)[1]
+        return date(year, number, 1).isoformat(), date(year, number, last_day).isoformat()
+
+    @classmethod
+    def _snapshot_dir(cls, population, month):
+        """Directory for the current data version; a write to the month changes the name"""
+        start_date, end_date = cls.month_range(month)
+        version = ExportCache.data_version(population, start_date, end_date)[f'{population}:{month}']
+        return os.path.join(Config.REPORT_SNAPSHOT_DIR, f'{population}_{month}_v{version}')
+
+    # ==================== BUILD / LOAD ====================
+
+    @classmethod
+    def get(cls, population, month):
+        """Snapshot dict (ReportStats, csv_path, xlsx_path) for a closed month, built on first use"""
+        ExportService.resolve_populations(population)
+        start_date, end_date = cls.month_range(month)
+        if not ExportCache.is_closed(start_date, end_date):
+            raise ValueError(f"{month} is not closed yet")
+
+        if not Config.EXPORT_CACHE_ENABLED:
+            # No shared data version to trust: build a private copy for this caller only
+            directory = os.path.join(Config.REPORT_SNAPSHOT_DIR, f'{population}_{month}_u{uuid.uuid4().hex}')
+            cls._build(population, month, directory)
+            snapshot = cls._load(directory)
+            snapshot['uncached'] = True
+            return snapshot
+
+        directory = cls._snapshot_dir(population, month)
+        snapshot = cls._load(directory)
+        if snapshot:
+            print(f"⚡ Report snapshot hit: {population} {month}")
+            return snapshot
+
+        with cls._lock:
+            snapshot = cls._load(directory)
+            if not snapshot:
+                cls._build(population, month, directory)
+                snapshot = cls._load(directory)
+        return snapshot
+
+    @classmethod
+    def _load(cls, directory):
+        try:
+            with open(os.path.join(directory, 'stats.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta['stats'] = ReportStats.from_dict(meta['stats'])
+        meta['csv_path'] = os.path.join(directory, meta['csv_name'])
+        meta['xlsx_path'] = os.path.join(directory, meta['xlsx_name'])
+        return meta
+
+    @classmethod
+    def write_artifacts(cls, population, start_date, end_date, csv_file, xlsx_file):
+        """Fetch rows once, writing CSV and XLSX (binary files, XLSX optional) while collecting ReportStats"""
+        headers, row_fn, reader = ExportService.get_population(population)
+        stats = ReportStats()
+        text = io.TextIOWrapper(csv_file, encoding='utf-8', newline='', write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(headers)
+
+        def pages():
+            for page in reader(start_date, end_date):
+                rows = [row_fn(record) for record in stats.add_page(page)]
+                writer.writerows(rows)
+                yield rows
+
+        try:
+            if xlsx_file is None:
+                for _ in pages():
+                    pass
+            else:
+                ExportService.write_xlsx(xlsx_file, [(population.capitalize(), headers, pages())])
+        finally:
+            text.detach()  # leave csv_file open for the caller
+        return stats
+
+    @classmethod
+    def _build(cls, population, month, directory):
+        """Fetch the month once, writing CSV, XLSX and stats in the same pass"""
+        start_date, end_date = cls.month_range(month)
+        os.makedirs(Config.REPORT_SNAPSHOT_DIR, exist_ok=True)
+        tmp_dir = f'{directory}.{uuid.uuid4().hex}.tmp'
+        os.makedirs(tmp_dir)
+        csv_name, xlsx_name = f'{population}_{month}.csv', f'{population}_{month}.xlsx'
+
+        try:
+            with open(os.path.join(tmp_dir, csv_name), 'wb') as csv_file, \
+                    open(os.path.join(tmp_dir, xlsx_name), 'wb') as xlsx_file:
+                stats = cls.write_artifacts(population, start_date, end_date, csv_file, xlsx_file)
+
+            meta = {
+                'population': population,
+                'month': month,
+                'start_date': start_date,
+                'end_date': end_date,
+                'stats': stats.to_dict(),
+                'csv_name': csv_name,
+                'xlsx_name': xlsx_name
+            }
+            with open(os.path.join(tmp_dir, 'stats.json'), 'w') as f:
+                json.dump(meta, f)
+            try:
+                os.replace(tmp_dir, directory)
+            except OSError:
+                # Another process published the same version first
+                if not os.path.isdir(directory):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        # Older versions of this month are superseded by the one just written
+        for stale in glob.glob(os.path.join(Config.REPORT_SNAPSHOT_DIR, f'{population}_{month}_v*')):
+            if stale != directory and not stale.endswith('.tmp'):
+                shutil.rmtree(stale, ignore_errors=True)
+        print(f"📸 Report snapshot built: {population} {month} ({stats.total} rows)")
+
+    @classmethod
+    def release(cls, snapshot):
+        """Delete a throwaway snapshot once its files have been read; cached ones are kept"""
+        if snapshot and snapshot.get('uncached'):
+            shutil.rmtree(os.path.dirname(snapshot['csv_path']), ignore_errors=True)
+
+    @classmethod
+    def read_bytes(cls, snapshot, kind):
+        """Attachment bytes of a snapshot ('csv' or 'xlsx')"""
+        with open(snapshot[f'{kind}_path'], 'rb') as f:
+            return f.read()
+
+    # ==================== EXPORT REUSE ====================
+
+    EXPORT_FORMATS = {'csv': ('csv', 'text/csv'), 'excel': ('xlsx', ExportService.XLSX_MIMETYPE)}
+
+    @classmethod
+    def export(cls, format_type, population, start_date, end_date):
+        """Serve a closed single-population full-month CSV/Excel export from its snapshot, else None"""
+        if not Config.EXPORT_CACHE_ENABLED:
+            return None
+        if format_type not in cls.EXPORT_FORMATS or population not in ExportService.POPULATIONS:
+            return None
+        if not start_date or start_date[:7] != (end_date or '')[:7]:
+            return None
+        month = start_date[:7]
+        try:
+            if (start_date[:10], end_date[:10]) != cls.month_range(month):
+                return None
+            snapshot = cls.get(population, month)
+        except ValueError:
+            return None
+
+        kind, mimetype = cls.EXPORT_FORMATS[format_type]
+        handle = open(snapshot[f'{kind}_path'], 'rb')
+        return ExportService.stream_file(handle), mimetype, snapshot[f'{kind}_name']
+
+    # ==================== LIFETIME ====================
+
+    @classmethod
+    def _csv_pages(cls, fileobj, page_size=1000):
+        """Re-read a stored CSV (binary file) as row pages, without its header"""
+        fileobj.seek(0)
+        text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        try:
+            reader = csv.reader(text)
+            next(reader, None)
+            page = []
+            for row in reader:
+                if row and row[0].isdigit():
+                    row[0] = int(row[0])  # ID column, numeric like in a fresh export
+                page.append(row)
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+        finally:
+            text.detach()
+
+    @classmethod
+    def _lifetime_months(cls, population):
+        """(current month, closed months oldest first) of a population's history"""
+        first_date = Database.get_first_visit_date('visitors' if population == 'students' else 'teachers')
+        current_month = Database._get_indian_time().strftime('%Y-%m')
+        closed_months = [m for m in cls.months_between(first_date, current_month) if m < current_month] if first_date else []
+        return current_month, closed_months
+
+    @classmethod
+    def lifetime(cls, population):
+        """Lifetime (ReportStats, CSV bytes, XLSX bytes): monthly snapshots plus the live current month"""
+        if not Config.EXPORT_CACHE_ENABLED:
+            # Snapshots would be rebuilt per call: one ranged fetch is cheaper than one per month
+            csv_file, xlsx_file = io.BytesIO(), io.BytesIO()
+            stats = cls.write_artifacts(population, None, None, csv_file, xlsx_file)
+            return stats, csv_file.getvalue(), xlsx_file.getvalue()
+
+        headers = ExportService.get_population(population)[0]
+        current_month, closed_months = cls._lifetime_months(population)
+
+        # Only the current month is read from Supabase; older months come from their snapshots
+        live_csv = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_BYTES)
+        sources = [live_csv]
+        try:
+            stats = cls.write_artifacts(population, f'{current_month}-01', None, live_csv, None)
+            for month in reversed(closed_months):  # newest first, like the exports
+                snapshot = cls.get(population, month)
+                stats.merge(snapshot['stats'])
+                sources.append(open(snapshot['csv_path'], 'rb'))
+
+            csv_out = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_BYTES)
+            xlsx_out = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_BYTES)
+            with csv_out, xlsx_out:
+                for index, source in enumerate(sources):
+                    source.seek(0)
+                    if index:
+                        source.readline()  # keep only the first file's header
+                    shutil.copyfileobj(source, csv_out)
+
+                pages = (page for source in sources for page in cls._csv_pages(source))
+                ExportService.write_xlsx(xlsx_out, [(population.capitalize(), headers, pages)])
+
+                csv_out.seek(0)
+                xlsx_out.seek(0)
+                print(f"📚 Lifetime {population} report composed from {len(closed_months)} monthly snapshot(s) + live month")
+                return stats, csv_out.read(), xlsx_out.read()
+        finally:
+            for source in sources:
+                source.close()
+
+    @classmethod
+    def lifetime_months(cls, population):
+        """[(month, CSV bytes, XLSX bytes)] newest first, for mailing a lifetime report in parts"""
+        if not Config.EXPORT_CACHE_ENABLED:
+            return cls._split_by_month(population)
+
+        current_month, closed_months = cls._lifetime_months(population)
+        csv_file, xlsx_file = io.BytesIO(), io.BytesIO()
+        stats = cls.write_artifacts(population, f'{current_month}-01', None, csv_file, xlsx_file)
+        months = [(current_month, csv_file.getvalue(), xlsx_file.getvalue())] if stats.total else []
+        for month in reversed(closed_months):
+            snapshot = cls.get(population, month)
+            if snapshot['stats'].total:
+                months.append((month, cls.read_bytes(snapshot, 'csv'), cls.read_bytes(snapshot, 'xlsx')))
+        return months
+
+    @classmethod
+    def _split_by_month(cls, population):
+        """lifetime_months() from one ranged fetch, spooling each month's CSV before writing its XLSX"""
+        headers, row_fn, reader = ExportService.get_population(population)
+        spools = {}
+        try:
+            for page in reader(None, None):
+                for record in page:
+                    month = str(record.get('visit_date') or '')[:7]
+                    if month not in spools:
+                        spool = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_BYTES)
+                        text = io.TextIOWrapper(spool, encoding='utf-8', newline='', write_through=True)
+                        spools[month] = (spool, text, csv.writer(text))
+                        spools[month][2].writerow(headers)
+                    spools[month][2].writerow(row_fn(record))
+
+            months = []
+            for month in sorted(spools, reverse=True):
+                spool, text = spools[month][:2]
+                text.detach()
+                xlsx_file = io.BytesIO()
+                ExportService.write_xlsx(xlsx_file, [(population.capitalize(), headers, cls._csv_pages(spool))])
+                spool.seek(0)
+                months.append((month, spool.read(), xlsx_file.getvalue()))
+            return months
+        finally:
+            for spool, _, _ in spools.values():
+                spool.close()
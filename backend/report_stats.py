@@ -0,0 +1,141 @@
+class ReportStats:
+    """Report figures accumulated in one streaming pass; partial results can be merged"""
+
+    def __init__(self):
+        self.total = 0
+        self.active = 0
+        self.levels = {}
+        self.purposes = {}
+        self.daily = {}        # visit_date -> visits
+        self.visitors = set()  # roll_no / employee_id
+        self.names = set()
+        self.completed = 0     # visits with both entry and exit time
+        self.duration_seconds = 0
+
+    # ==================== ACCUMULATION ====================
+
+    @staticmethod
+    def _seconds(value):
+        """Seconds since midnight of an 'HH:MM[:SS]' time, or None"""
+        try:
+            parts = [int(float(part)) for part in str(value).split(':')[:3]]
+        except (TypeError, ValueError):
+            return None
+        if len(parts) < 2:
+            return None
+        return parts[0] * 3600 + parts[1] * 60 + (parts[2] if len(parts) > 2 else 0)
+
+    def add(self, record):
+        """Count one visitor or teacher row"""
+        self.total += 1
+        if record.get('exit_time') is None:
+            self.active += 1
+        else:
+            entry, exit_ = self._seconds(record.get('entry_time')), self._seconds(record.get('exit_time'))
+            if entry is not None and exit_ is not None and exit_ >= entry:
+                self.completed += 1
+                self.duration_seconds += exit_ - entry
+
+        level = record.get('level')
+        if level:
+            self.levels[level] = self.levels.get(level, 0) + 1
+        purpose = record.get('purpose')
+        if purpose:
+            self.purposes[purpose] = self.purposes.get(purpose, 0) + 1
+        visit_date = record.get('visit_date')
+        if visit_date:
+            visit_date = str(visit_date)[:10]
+            self.daily[visit_date] = self.daily.get(visit_date, 0) + 1
+
+        visitor = record.get('roll_no') or record.get('employee_id')
+        if visitor:
+            self.visitors.add(visitor)
+        if record.get('name'):
+            self.names.add(record['name'])
+
+    def add_page(self, records):
+        """Count a page of rows and hand it back, so it can sit inside a row pipeline"""
+        for record in records:
+            self.add(record)
+        return records
+
+    def merge(self, other):
+        """Fold another partial result (e.g. another month) into this one"""
+        self.total += other.total
+        self.active += other.active
+        self.completed += other.completed
+        self.duration_seconds += other.duration_seconds
+        for mine, theirs in ((self.levels, other.levels), (self.purposes, other.purposes), (self.daily, other.daily)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.visitors |= other.visitors
+        self.names |= other.names
+        return self
+
+    # ==================== FIGURES ====================
+
+    @property
+    def days(self):
+        return len(self.daily)
+
+    @property
+    def first_date(self):
+        return min(self.daily) if self.daily else None
+
+    @property
+    def last_date(self):
+        return max(self.daily) if self.daily else None
+
+    @property
+    def avg_daily(self):
+        return round(self.total / self.days, 1) if self.daily else 0
+
+    @property
+    def avg_duration_minutes(self):
+        return round(self.duration_seconds / self.completed / 60, 1) if self.completed else 0
+
+    def summary(self):
+        """Headline figures for report bodies and API responses"""
+        return {
+            'total': self.total,
+            'active': self.active,
+            'levels': dict(self.levels),
+            'purposes': dict(self.purposes),
+            'unique_visitors': len(self.visitors),
+            'unique_names': len(self.names),
+            'days': self.days,
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'avg_daily': self.avg_daily,
+            'avg_duration_minutes': self.avg_duration_minutes
+        }
+
+    # ==================== SERIALIZATION ====================
+
+    def to_dict(self):
+        """JSON-friendly state that from_dict can restore and merge later"""
+        return {
+            'total': self.total,
+            'active': self.active,
+            'levels': self.levels,
+            'purposes': self.purposes,
+            'daily': self.daily,
+            'visitors': sorted(self.visitors),
+            'names': sorted(self.names),
+            'completed': self.completed,
+            'duration_seconds': self.duration_seconds
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.active = data['active']
+        stats.levels = dict(data['levels'])
+        stats.purposes = dict(data['purposes'])
+        stats.daily = dict(data['daily'])
+        stats.visitors = set(data['visitors'])
+        stats.names = set(data['names'])
+        stats.completed = data['completed']
+        stats.duration_seconds = data['duration_seconds']
+        return stats
@@ -1,13 +1,7 @@
-from flask import Blueprint, jsonify, request, render_template, make_response, session
+from flask import Blueprint, jsonify, request, render_template, make_response, session, Response
 from functools import wraps
 from datetime import datetime, timedelta
-import json
-import io
-import csv
-import pandas as pd
 import jwt
-import zipfile
-from io import BytesIO
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -18,8 +12,24 @@ from backend.supabase_direct import SupabaseDirect as Database
 from backend.models.visitor_model import get_all_visitors, get_today_visitors, get_filtered_visitors, get_visitors_by_date_range
 from backend.config import Config
 
-# Import email service for reports
-from backend.email_service import EmailService
+# Import background report jobs (email delivery)
+from backend.report_jobs import ReportJobs
+from backend.mail_outbox import MailOutbox
+
+# Import streaming export helpers
+from backend.export_service import ExportService
+from backend.export_jobs import ExportJobs
+from backend.export_cache import ExportCache
+from backend.report_snapshots import ReportSnapshots
+
+# Import chunked import pipeline
+from backend.import_service import ImportService
+from backend.import_jobs import ImportJobs
+from backend.job_queue import QueueFullError
+
+# Import verified-token cache and rate limiter (for metrics)
+from backend.token_cache import TokenCache
+from backend.rate_limiter import RateLimiter
 
 # ==================== JWT HELPER FUNCTIONS ====================
 
@@ -34,15 +44,27 @@ def create_jwt_token(username):
     return token
 
 def verify_jwt_token(token):
-    """Verify JWT token"""
+    """Verify JWT token (recently verified tokens are served from TokenCache)"""
+    hit, username = TokenCache.lookup(token)
+    if hit:
+        return username
     try:
         payload = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=['HS256'])
+        TokenCache.store(token, payload['username'], payload['exp'])
         return payload['username']
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+def revoke_jwt_token(token):
+    """Make a still-valid token unusable (logout)"""
+    try:
+        payload = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return
+    TokenCache.revoke(token, payload['exp'])
+
 # ==================== LOGIN REQUIRED DECORATOR ====================
 
 def login_required(f):
@@ -142,6 +164,11 @@ def admin_login():
 def admin_logout():
     """Logout admin and redirect to homepage"""
     try:
+        # Revoke the token itself, not just the cookie holding it
+        token = request.cookies.get('admin_token')
+        if token:
+            revoke_jwt_token(token)
+        
         # Clear Flask session
         session.clear()
         
@@ -178,6 +205,12 @@ def check_session():
     else:
         return jsonify({'logged_in': False, 'username': None})
 
+@admin_bp.route('/metrics')
+@login_required
+def admin_metrics():
+    """Runtime counters (token cache hit rate, rate limiter rejections)"""
+    return jsonify({'token_cache': TokenCache.metrics(), 'rate_limiter': RateLimiter.metrics()}), 200
+
 # ==================== DASHBOARD ROUTES ====================
 
 @admin_bp.route('/dashboard')
@@ -444,10 +477,8 @@ def advanced_analytics():
 @admin_bp.route('/import_data', methods=['POST'])
 @login_required
 def import_data():
-    """Import data from CSV or Excel"""
+    """Import visitors from CSV, Excel, .csv.gz or .zip in chunks with a row-level error report"""
     try:
-        from flask import send_file
-        
         if 'file' not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
         
@@ -455,222 +486,213 @@ def import_data():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Check file extension
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file)
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file)
-        else:
-            return jsonify({"error": "Unsupported file format"}), 400
-        
-        # Validate required columns
-        required_columns = ['name', 'roll_no', 'level', 'purpose']
-        for col in required_columns:
-            if col not in df.columns:
-                return jsonify({"error": f"Missing required column: {col}"}), 400
-        
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                visitor_data = {
-                    'name': str(row['name']).strip(),
-                    'roll_no': str(row['roll_no']).strip().upper(),
-                    'level': str(row['level']).strip().upper(),
-                    'purpose': str(row['purpose']).strip(),
-                    'course': str(row['course']).strip() if 'course' in df.columns and pd.notna(row.get('course')) else 'Not Specified'
-                }
-                
-                # Add year/stream based on level
-                if visitor_data['level'] == 'JC':
-                    if 'jc_year' in df.columns and pd.notna(row.get('jc_year')):
-                        visitor_data['jc_year'] = str(row['jc_year']).strip()
-                    if 'jc_stream' in df.columns and pd.notna(row.get('jc_stream')):
-                        visitor_data['jc_stream'] = str(row['jc_stream']).strip()
-                elif 'year' in df.columns and pd.notna(row.get('year')):
-                    visitor_data['year'] = str(row['year']).strip()
-                
-                # ✅ USE DIRECT API
-                result = Database.insert_visitor(visitor_data)
-                
-                if result:
-                    imported_count += 1
-                else:
-                    errors.append(f"Row {index + 1}: Failed to insert")
-                
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
+        report = ImportService.new_report()
+        try:
+            ImportService.import_file(file.stream, file.filename, report)
+        except Exception as e:
+            if not report['chunks_committed']:
+                if isinstance(e, ValueError):
+                    # Unsupported format or missing required column: nothing was written
+                    return jsonify({"error": str(e)}), 400
+                raise
+            # Earlier chunks are already stored: report them and where the import stopped
+            return jsonify({
+                "success": False,
+                "error": f"Import stopped after {report['inserted']} records: {str(e).strip()}",
+                "rows_read": report['rows_read'],
+                "imported": report['inserted'],
+                "duplicates": report['duplicates'],
+                "rejected": report['rejected'],
+                "errors": report['errors'],
+                "failed_at": report.get('failure')
+            }), 422 if isinstance(e, ValueError) else 500
+        finally:
+            # Also after a partial import: the months written so far have changed
+            if report['dates']:
+                ExportCache.invalidate('students', report['dates'])
         
         return jsonify({
             "success": True,
-            "message": f"Imported {imported_count} records successfully",
-            "errors": errors[:10] if errors else []
+            "message": f"Imported {report['inserted']} records successfully ({report['duplicates']} duplicates skipped)",
+            "rows_read": report['rows_read'],
+            "imported": report['inserted'],
+            "duplicates": report['duplicates'],
+            "rejected": report['rejected'],
+            "errors": report['errors']
         }), 200
         
     except Exception as e:
         print(f"Import error: {e}")
         return jsonify({"error": f"Import failed: {str(e)}"}), 500
 
+# ==================== IMPORT JOB ROUTES ====================
+
+@admin_bp.route('/import_jobs', methods=['POST'])
+@login_required
+def submit_import_job():
+    """Queue a large import in the background and return its job id"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file uploaded"}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({"error": "No file selected"}), 400
+        
+        job = ImportJobs.submit(file)
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status_url": f"/admin/import_jobs/{job.id}"
+        }), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+    except Exception as e:
+        print(f"Import job error: {e}")
+        return jsonify({"error": "Failed to queue import"}), 500
+
+@admin_bp.route('/import_jobs/<job_id>', methods=['GET'])
+@login_required
+def import_job_status(job_id):
+    """Poll an import job (rows read, inserted, duplicates, rejected, throughput)"""
+    status = ImportJobs.status(job_id)
+    if not status:
+        return jsonify({"error": "Import job not found"}), 404
+    return jsonify(status), 200
+
+@admin_bp.route('/import_jobs/<job_id>/resume', methods=['POST'])
+@login_required
+def resume_import_job(job_id):
+    """Continue a failed or interrupted import from its last committed chunk"""
+    try:
+        job = ImportJobs.resume(job_id)
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "resumed_from_chunk": job.progress.get('chunks_committed', 0),
+            "status_url": f"/admin/import_jobs/{job.id}"
+        }), 202
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+    except Exception as e:
+        print(f"Import resume error: {e}")
+        return jsonify({"error": "Failed to resume import"}), 500
+
 # ==================== EXPORT DATA ROUTE (UPDATED - Students + Teachers) ====================
 
 @admin_bp.route('/export_data', methods=['GET'])
 @login_required
 def export_data():
-    """Export data to CSV or Excel with both Students and Teachers"""
+    """Export Students and/or Teachers as CSV, Excel, Parquet or Arrow"""
     try:
-        from flask import send_file
-        import zipfile
-        from io import BytesIO
-        
         format_type = request.args.get('format', 'csv')
         start_date = request.args.get('start_date', '')
         end_date = request.args.get('end_date', '')
+        population = request.args.get('population', 'all')
         
-        # Get student data
-        if start_date and end_date:
-            students = Database.get_visitors_by_date_range(start_date, end_date)
-        else:
-            students = Database.get_all_visitors()
-        
-        # Get teacher data
-        if start_date and end_date:
-            teachers = Database.get_teachers_by_date_range(start_date, end_date)
-        else:
-            teachers = Database.get_all_teachers()
-        
-        # ==================== EXCEL FORMAT (2 sheets) ====================
-        if format_type == 'excel':
-            output = io.BytesIO()
-            
-            # Create DataFrames
-            student_data = []
-            for v in students:
-                if v.get('level') == 'JC':
-                    course_val = v.get('jc_stream', '')
-                    year_val = v.get('jc_year', '')
-                else:
-                    course_val = v.get('course', '')
-                    year_val = v.get('year', '')
-                
-                student_data.append({
-                    'ID': v.get('id', ''),
-                    'Name': v.get('name', ''),
-                    'Roll No': v.get('roll_no', ''),
-                    'Level': v.get('level', ''),
-                    'Course/Stream': course_val,
-                    'Year': year_val,
-                    'Purpose': v.get('purpose', ''),
-                    'Entry Time': str(v.get('entry_time', '')),
-                    'Exit Time': str(v.get('exit_time', '')),
-                    'Visit Date': str(v.get('visit_date', '')),
-                    'Day': v.get('visit_day', '')
-                })
-            
-            teacher_data = []
-            for t in teachers:
-                teacher_data.append({
-                    'ID': t.get('id', ''),
-                    'Name': t.get('name', ''),
-                    'Employee ID': t.get('employee_id', ''),
-                    'Designation': t.get('designation', ''),
-                    'Nature of Work': t.get('nature_of_work', ''),
-                    'Purpose': t.get('purpose', ''),
-                    'Notes': t.get('notes', ''),
-                    'Entry Time': str(t.get('entry_time', '')),
-                    'Exit Time': str(t.get('exit_time', '')),
-                    'Visit Date': str(t.get('visit_date', '')),
-                    'Day': t.get('visit_day', '')
-                })
-            
-            df_students = pd.DataFrame(student_data)
-            df_teachers = pd.DataFrame(teacher_data)
-            
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df_students.to_excel(writer, sheet_name='Students', index=False)
-                df_teachers.to_excel(writer, sheet_name='Teachers', index=False)
-            
-            output.seek(0)
-            return send_file(
-                output,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name=f'library_export_{datetime.now().strftime("%Y%m%d")}.xlsx'
-            )
-        
-        # ==================== CSV FORMAT (2 files in ZIP) ====================
-        elif format_type == 'csv':
-            zip_buffer = BytesIO()
-            
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                # Students CSV
-                student_output = io.StringIO()
-                student_writer = csv.writer(student_output)
-                student_writer.writerow(['ID', 'Name', 'Roll No', 'Level', 'Course/Stream', 'Year', 'Purpose', 'Entry Time', 'Exit Time', 'Visit Date', 'Day'])
-                
-                for v in students:
-                    if v.get('level') == 'JC':
-                        course_val = v.get('jc_stream', '')
-                        year_val = v.get('jc_year', '')
-                    else:
-                        course_val = v.get('course', '')
-                        year_val = v.get('year', '')
-                    
-                    student_writer.writerow([
-                        v.get('id', ''),
-                        v.get('name', ''),
-                        v.get('roll_no', ''),
-                        v.get('level', ''),
-                        course_val,
-                        year_val,
-                        v.get('purpose', ''),
-                        str(v.get('entry_time', '')),
-                        str(v.get('exit_time', '')),
-                        str(v.get('visit_date', '')),
-                        v.get('visit_day', '')
-                    ])
-                
-                student_output.seek(0)
-                zip_file.writestr(f'students_{datetime.now().strftime("%Y%m%d")}.csv', student_output.getvalue().encode('utf-8'))
-                
-                # Teachers CSV
-                teacher_output = io.StringIO()
-                teacher_writer = csv.writer(teacher_output)
-                teacher_writer.writerow(['ID', 'Name', 'Employee ID', 'Designation', 'Nature of Work', 'Purpose', 'Notes', 'Entry Time', 'Exit Time', 'Visit Date', 'Day'])
-                
-                for t in teachers:
-                    teacher_writer.writerow([
-                        t.get('id', ''),
-                        t.get('name', ''),
-                        t.get('employee_id', ''),
-                        t.get('designation', ''),
-                        t.get('nature_of_work', ''),
-                        t.get('purpose', ''),
-                        t.get('notes', ''),
-                        str(t.get('entry_time', '')),
-                        str(t.get('exit_time', '')),
-                        str(t.get('visit_date', '')),
-                        t.get('visit_day', '')
-                    ])
-                
-                teacher_output.seek(0)
-                zip_file.writestr(f'teachers_{datetime.now().strftime("%Y%m%d")}.csv', teacher_output.getvalue().encode('utf-8'))
-            
-            zip_buffer.seek(0)
-            return send_file(
-                zip_buffer,
-                mimetype='application/zip',
-                as_attachment=True,
-                download_name=f'library_export_{datetime.now().strftime("%Y%m%d")}.zip'
-            )
-        
-        else:
+        if format_type not in ExportService.EXPORTERS:
             return jsonify({"error": "Invalid format"}), 400
+        
+        try:
+            ExportService.resolve_populations(population)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # CSV streams page by page (single CSV or ZIP); Excel is written with a write-only workbook.
+        # A full closed month of one population reuses its report snapshot; other closed
+        # date ranges are served from (and stored into) the on-disk export cache.
+        chunks, mimetype, download_name = ReportSnapshots.export(
+            format_type, population, start_date, end_date
+        ) or ExportCache.get_or_build(
+            format_type, population, start_date, end_date,
+            lambda: ExportService.build_export(format_type, population, start_date or None, end_date or None)
+        )
+        return Response(
+            chunks,
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={download_name}'}
+        )
             
+    except RuntimeError as e:
+        # Optional dependency (pyarrow) missing for parquet/arrow
+        print(f"Export error: {e}")
+        return jsonify({"error": str(e)}), 501
     except Exception as e:
         print(f"Export error: {e}")
         return jsonify({"error": "Export failed"}), 500
 
+# ==================== EXPORT JOB ROUTES ====================
+
+@admin_bp.route('/export_jobs', methods=['POST'])
+@login_required
+def submit_export_job():
+    """Queue an export in the background and return its job id"""
+    try:
+        data = request.get_json(silent=True) or request.form or request.args
+        if not Config.BACKGROUND_JOBS_ENABLED:
+            # Serverless: no worker survives the response, so point at the streaming export instead
+            download_url = ExportJobs.stream_url(
+                data.get('format', 'csv'),
+                data.get('population', 'all'),
+                data.get('start_date') or None,
+                data.get('end_date') or None
+            )
+            return jsonify({"success": True, "mode": "stream", "download_url": download_url}), 200
+        
+        job = ExportJobs.submit(
+            data.get('format', 'csv'),
+            data.get('population', 'all'),
+            data.get('start_date') or None,
+            data.get('end_date') or None
+        )
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status_url": f"/admin/export_jobs/{job.id}"
+        }), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+    except Exception as e:
+        print(f"Export job error: {e}")
+        return jsonify({"error": "Failed to queue export"}), 500
+
+@admin_bp.route('/export_jobs/<job_id>', methods=['GET'])
+@login_required
+def export_job_status(job_id):
+    """Poll an export job (rows processed, bytes written)"""
+    job = ExportJobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+    return jsonify(ExportJobs.status(job)), 200
+
+@admin_bp.route('/export_jobs/<job_id>/download', methods=['GET'])
+@login_required
+def download_export_job(job_id):
+    """Download the artifact of a finished export job"""
+    from flask import send_file
+    
+    job = ExportJobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+    if job.status != 'done':
+        return jsonify({"error": f"Export job is {job.status}"}), 409
+    
+    artifact = job.result
+    return send_file(
+        artifact['path'],
+        mimetype=artifact['mimetype'],
+        as_attachment=True,
+        download_name=artifact['download_name']
+    )
+
 @admin_bp.route('/bulk_actions', methods=['POST'])
 @login_required
 def bulk_actions():
@@ -683,6 +705,9 @@ def bulk_actions():
         if not visitor_ids:
             return jsonify({"error": "No visitors selected"}), 400
         
+        # Exports cached for the months these rows belong to become stale
+        touched_dates = Database.get_visit_dates('visitors', visitor_ids)
+        
         if action == 'mark_exit':
             success_count = 0
             for visitor_id in visitor_ids:
@@ -694,6 +719,9 @@ def bulk_actions():
                 except:
                     pass
             
+            if success_count:
+                ExportCache.invalidate('students', touched_dates)
+            
             return jsonify({
                 "success": True,
                 "message": f"Marked {success_count} visitors as exited"
@@ -710,6 +738,9 @@ def bulk_actions():
                 except:
                     pass
             
+            if success_count:
+                ExportCache.invalidate('students', touched_dates)
+            
             return jsonify({
                 "success": True,
                 "message": f"Deleted {success_count} visitors"
@@ -763,8 +794,10 @@ def admin_teachers_filter():
 def admin_mark_teacher_exit(teacher_id):
     """Admin force exit for teacher"""
     try:
+        touched_dates = Database.get_visit_dates('teachers', [teacher_id])
         result = Database.update_teacher_exit_by_id(teacher_id)
         if result:
+            ExportCache.invalidate('teachers', touched_dates)
             return jsonify({"success": True}), 200
         else:
             return jsonify({"error": "Failed to mark exit"}), 500
@@ -777,8 +810,10 @@ def admin_delete_teacher(teacher_id):
     """Admin delete teacher record"""
     try:
         from backend.supabase_direct import SupabaseDirect as Database
+        touched_dates = Database.get_visit_dates('teachers', [teacher_id])
         result = Database.delete_teacher(teacher_id)
         if result:
+            ExportCache.invalidate('teachers', touched_dates)
             return jsonify({"success": True}), 200
         else:
             return jsonify({"error": "Failed to delete teacher"}), 500
@@ -787,34 +822,91 @@ def admin_delete_teacher(teacher_id):
 
 # ==================== EMAIL REPORT ROUTES ====================
 
-@admin_bp.route('/send_monthly_report', methods=['POST'])
-@login_required
-def send_monthly_report():
-    """Send monthly report email"""
+def _queue_report_job(names, label):
+    """Enqueue a report job and answer 202 with its status URL (or run it inline on serverless hosts)"""
     try:
-        success = EmailService.send_monthly_report()
-        if success:
-            return jsonify({"success": True, "message": "Monthly report sent successfully"}), 200
-        else:
-            return jsonify({"success": False, "error": "Failed to send monthly report. Check email configuration."}), 500
+        if not Config.BACKGROUND_JOBS_ENABLED:
+            # The instance may freeze after the response, so generate and deliver before answering
+            status = ReportJobs.run_inline(names)
+            return jsonify({"success": status['status'] == 'done', **status}), 200 if status['status'] == 'done' else 500
+        
+        job = ReportJobs.submit(names)
+        return jsonify({
+            "success": True,
+            "message": f"{label} queued",
+            "job_id": job.id,
+            "status_url": f"/admin/report_jobs/{job.id}"
+        }), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
     except Exception as e:
-        print(f"Error sending monthly report: {e}")
+        print(f"Error queueing {label.lower()}: {e}")
         return jsonify({"error": str(e)}), 500
 
+@admin_bp.route('/send_monthly_report', methods=['POST'])
+@login_required
+def send_monthly_report():
+    """Send monthly report email in the background"""
+    return _queue_report_job(['monthly'], "Monthly report")
+
 @admin_bp.route('/send_lifetime_report', methods=['POST'])
 @login_required
 def send_lifetime_report():
-    """Send lifetime report email"""
+    """Send lifetime report email in the background"""
+    return _queue_report_job(['lifetime'], "Lifetime report")
+
+@admin_bp.route('/send_reports', methods=['POST'])
+@login_required
+def send_reports():
+    """Send several reports in one SMTP session (default: monthly students + teachers)"""
+    data = request.get_json(silent=True) or {}
+    names = data.get('reports') or ['monthly', 'monthly_teachers']
+    return _queue_report_job(names, "Report batch")
+
+@admin_bp.route('/report_jobs/<job_id>', methods=['GET'])
+@login_required
+def report_job_status(job_id):
+    """Poll a report job (reports sent so far, results, SMTP timing)"""
+    job = ReportJobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Report job not found"}), 404
+    return jsonify(ReportJobs.status(job)), 200
+
+@admin_bp.route('/outbox', methods=['GET'])
+@login_required
+def outbox_status():
+    """Queued, retrying, sent and dead report emails"""
     try:
-        success = EmailService.send_lifetime_report()
-        if success:
-            return jsonify({"success": True, "message": "Lifetime report sent successfully"}), 200
-        else:
-            return jsonify({"success": False, "error": "Failed to send lifetime report. Check email configuration."}), 500
+        return jsonify(MailOutbox.status(request.args.get('limit', 50, type=int))), 200
     except Exception as e:
-        print(f"Error sending lifetime report: {e}")
+        print(f"Outbox status error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@admin_bp.route('/outbox/<int:entry_id>/retry', methods=['POST'])
+@login_required
+def retry_outbox_entry(entry_id):
+    """Give a report email that exhausted its retries another round"""
+    if not MailOutbox.retry(entry_id):
+        return jsonify({"error": "Only dead outbox entries can be retried"}), 409
+    return jsonify({"success": True, "message": f"Outbox entry {entry_id} queued for retry"}), 200
+
+@admin_bp.route('/report_artifacts/<key>', methods=['GET'])
+@login_required
+def download_report_artifact(key):
+    """Download report data that was too large to mail (kept for REPORT_ARTIFACT_TTL)"""
+    artifact = ExportCache.get_artifact(key)
+    if not artifact:
+        return jsonify({"error": "Report data not found (it may have expired; send the report again)"}), 404
+    
+    chunks, mimetype, download_name = artifact
+    return Response(
+        chunks,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={download_name}'}
+    )
+
 # ==================== ADD TEACHER (ADMIN ONLY) ====================
 
 @admin_bp.route('/add_teacher', methods=['POST'])
@@ -860,27 +952,11 @@ def add_teacher_admin():
 @admin_bp.route('/send_monthly_report_teachers', methods=['POST'])
 @login_required
 def send_monthly_report_teachers():
-    """Send monthly teacher report email"""
-    try:
-        success = EmailService.send_monthly_report_teachers()
-        if success:
-            return jsonify({"success": True, "message": "Monthly teacher report sent successfully"}), 200
-        else:
-            return jsonify({"success": False, "error": "Failed to send monthly teacher report"}), 500
-    except Exception as e:
-        print(f"Error sending monthly teacher report: {e}")
-        return jsonify({"error": str(e)}), 500
+    """Send monthly teacher report email in the background"""
+    return _queue_report_job(['monthly_teachers'], "Monthly teacher report")
 
 @admin_bp.route('/send_lifetime_report_teachers', methods=['POST'])
 @login_required
 def send_lifetime_report_teachers():
-    """Send lifetime teacher report email"""
-    try:
-        success = EmailService.send_lifetime_report_teachers()
-        if success:
-            return jsonify({"success": True, "message": "Lifetime teacher report sent successfully"}), 200
-        else:
-            return jsonify({"success": False, "error": "Failed to send lifetime teacher report"}), 500
-    except Exception as e:
-        print(f"Error sending lifetime teacher report: {e}")
-        return jsonify({"error": str(e)}), 500
+    """Send lifetime teacher report email in the background"""
+    return _queue_report_job(['lifetime_teachers'], "Lifetime teacher report")
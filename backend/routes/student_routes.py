@@ -1,15 +1,16 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, request, jsonify
 from backend.supabase_direct import SupabaseDirect as Database
+from backend.static_pages import StaticPages
 
 student_bp = Blueprint('student', __name__, url_prefix='/student')
 
 @student_bp.route('/', methods=['GET'])
 def visitor_form():
-    return render_template('visitor_form.html')
+    return StaticPages.response('visitor_form.html')
 
 @student_bp.route('/exit', methods=['GET'])
 def exit_form():
-    return render_template('exit_form.html')
+    return StaticPages.response('exit_form.html')
 
 @student_bp.route('/check/<roll_no>', methods=['GET'])
 def check_visitor(roll_no):
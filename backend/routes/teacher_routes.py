@@ -1,5 +1,6 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, request, jsonify
 from backend.supabase_direct import SupabaseDirect as Database
+from backend.static_pages import StaticPages
 from datetime import datetime
 
 teacher_bp = Blueprint('teacher', __name__, url_prefix='/teacher')
@@ -7,12 +8,12 @@ teacher_bp = Blueprint('teacher', __name__, url_prefix='/teacher')
 # Entry form page (hidden from homepage)
 @teacher_bp.route('/entry', methods=['GET'])
 def teacher_entry_form():
-    return render_template('teacher_entry.html')
+    return StaticPages.response('teacher_entry.html')
 
 # Exit form page (hidden from homepage)
 @teacher_bp.route('/exit', methods=['GET'])
 def teacher_exit_form():
-    return render_template('teacher_exit.html')
+    return StaticPages.response('teacher_exit.html')
 
 # Check if teacher is currently inside
 @teacher_bp.route('/check/<employee_id>', methods=['GET'])
@@ -0,0 +1,78 @@
+import time
+import smtplib
+
+
+class SMTPSession:
+    """One authenticated SMTP connection reused for a batch of messages"""
+
+    def __init__(self, config):
+        self.config = config
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.deliveries = []
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        """Open, STARTTLS and log in; called lazily so empty batches never touch the server"""
+        started = time.perf_counter()
+        server = smtplib.SMTP(self.config['server'], self.config['port'], timeout=self.config['timeout'])
+        try:
+            server.starttls()
+            server.login(self.config['username'], self.config['password'])
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self.connections += 1
+        self.connect_seconds += time.perf_counter() - started
+        print(f"📡 SMTP connected to {self.config['server']} in {time.perf_counter() - started:.2f}s")
+
+    def send(self, msg):
+        """Send msg to every configured recipient, reconnecting once if the server hung up"""
+        recipients = self.config['recipients']
+        started = time.perf_counter()
+        connect_before = self.connect_seconds
+        if self._server is None:
+            self._connect()
+        try:
+            refused = self._server.send_message(msg, to_addrs=recipients)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self._server.close()
+            self._server = None
+            self._connect()
+            refused = self._server.send_message(msg, to_addrs=recipients)
+
+        if refused:
+            print(f"⚠️ Recipients refused: {', '.join(refused)}")
+        self.deliveries.append({
+            'subject': msg['Subject'],
+            'recipients': len(recipients) - len(refused),
+            'seconds': round(time.perf_counter() - started, 3),
+            'connect_seconds': round(self.connect_seconds - connect_before, 3)  # login cost this send paid
+        })
+        return refused
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    def timing(self):
+        """Connection and per-message delivery timings for the batch"""
+        return {
+            'connections': self.connections,
+            'connect_seconds': round(self.connect_seconds, 3),
+            'messages': len(self.deliveries),
+            'send_seconds': round(sum(d['seconds'] for d in self.deliveries), 3),
+            'deliveries': list(self.deliveries)
+        }
@@ -0,0 +1,40 @@
+import threading
+from flask import current_app, render_template, request
+from backend.assets import Assets
+from backend.precompressed import PrecompressedPage
+
+
+class StaticPages:
+    """Templates whose output never changes, rendered once and served pre-compressed"""
+
+    # Informational and kiosk pages: no per-request data in the template
+    TEMPLATES = (
+        'index.html', 'about.html', 'developer.html', 'guide.html', 'library_services.html',
+        'visitor_form.html', 'exit_form.html', 'teacher_entry.html', 'teacher_exit.html'
+    )
+
+    _lock = threading.Lock()
+    _pages = {}
+
+    @classmethod
+    def _render(cls, app, template):
+        with app.test_request_context('/'):
+            return PrecompressedPage(Assets.minify_html(render_template(template)))
+
+    @classmethod
+    def render_all(cls, app):
+        """Render every page at startup so no request goes through Jinja"""
+        pages = {template: cls._render(app, template) for template in cls.TEMPLATES}
+        with cls._lock:
+            cls._pages.update(pages)
+        print(f"✅ Pre-rendered {len(pages)} static pages")
+
+    @classmethod
+    def response(cls, template):
+        """Serve a pre-rendered page (rendered now if startup did not get to it)"""
+        page = cls._pages.get(template)
+        if page is None:
+            page = cls._render(current_app._get_current_object(), template)
+            with cls._lock:
+                cls._pages[template] = page
+        return page.response(request)
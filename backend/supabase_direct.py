@@ -1,4 +1,5 @@
 import os
+import time
 import requests
 import json
 from datetime import datetime, timezone, timedelta
@@ -134,6 +135,25 @@ class SupabaseDirect:
             print(f"❌ Insert visitor error: {e}")
             return None
     
+    @classmethod
+    def insert_visitors_bulk(cls, records):
+        """Insert many already-normalized visitor records in one request"""
+        try:
+            if not records:
+                return True
+            url = f"{Config.SUPABASE_URL}/rest/v1/visitors"
+            headers = cls._get_headers()
+            headers['Prefer'] = 'return=minimal'
+            response = requests.post(url, headers=headers, json=records)
+            if response.status_code == 201:
+                print(f"✅ Bulk inserted {len(records)} visitors")
+                return True
+            print(f"❌ Bulk insert failed: {response.status_code} - {response.text[:200]}")
+            return False
+        except Exception as e:
+            print(f"❌ Bulk insert visitors error: {e}")
+            return False
+    
     @classmethod
     def get_active_visitor_by_rollno(cls, roll_no):
         """Get active visitor by roll number"""
@@ -278,6 +298,32 @@ class SupabaseDirect:
             print(f"❌ Connection failed: {e}")
             return False
     
+    @classmethod
+    def ping(cls, timeout=5):
+        """Time a one-row read of each table; {'ok', 'tables': {name: status}, 'latency_ms', 'error'}"""
+        started = time.perf_counter()
+        tables, error = {}, None
+        for table in ('visitors', 'teachers'):
+            try:
+                response = requests.get(
+                    f"{Config.SUPABASE_URL}/rest/v1/{table}",
+                    headers=cls._get_headers(),
+                    params={'select': 'id', 'limit': '1'},
+                    timeout=timeout
+                )
+                tables[table] = response.status_code
+                if response.status_code != 200 and error is None:
+                    error = f"{table}: {response.status_code} - {response.text[:200]}"
+            except Exception as e:
+                tables[table] = None
+                error = error or f"{table}: {e}"
+        return {
+            'ok': error is None,
+            'tables': tables,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': error
+        }
+    
     @classmethod
     def test_indian_time(cls):
         """Test Indian time function"""
@@ -490,3 +536,74 @@ class SupabaseDirect:
         except Exception as e:
             print(f"❌ Auto-exit teacher error: {e}")
             return 0
+
+    @classmethod
+    def get_visit_dates(cls, table, record_ids):
+        """Get the distinct visit dates of the given record ids in one request"""
+        try:
+            ids = [str(int(record_id)) for record_id in record_ids]
+            if not ids:
+                return set()
+            url = f"{Config.SUPABASE_URL}/rest/v1/{table}"
+            params = {'id': f'in.({",".join(ids)})', 'select': 'visit_date'}
+            response = requests.get(url, headers=cls._get_headers(), params=params)
+            if response.status_code == 200:
+                return {row['visit_date'] for row in response.json() if row.get('visit_date')}
+            return set()
+        except Exception as e:
+            print(f"❌ Get visit dates error: {e}")
+            return set()
+
+    @classmethod
+    def get_first_visit_date(cls, table):
+        """Earliest visit_date in a table (None when it is empty)"""
+        url = f"{Config.SUPABASE_URL}/rest/v1/{table}"
+        params = {'select': 'visit_date', 'visit_date': 'not.is.null', 'order': 'visit_date.asc', 'limit': '1'}
+        response = requests.get(url, headers=cls._get_headers(), params=params)
+        if response.status_code != 200:
+            raise Exception(f"Fetching first {table} visit failed: {response.status_code} - {response.text[:200]}")
+        rows = response.json()
+        return str(rows[0]['visit_date'])[:10] if rows else None
+
+    # ==================== PAGINATED READERS ====================
+
+    @classmethod
+    def _iter_pages(cls, table, start_date=None, end_date=None, page_size=None, select='*'):
+        """Yield rows of a table page by page (keyset pagination on id, newest first)"""
+        url = f"{Config.SUPABASE_URL}/rest/v1/{table}"
+        page_size = page_size or Config.EXPORT_PAGE_SIZE
+        last_id = None
+        while True:
+            params = [('select', select), ('order', 'id.desc'), ('limit', str(page_size))]
+            if start_date:
+                params.append(('visit_date', f'gte.{start_date}'))
+            if end_date:
+                params.append(('visit_date', f'lte.{end_date}'))
+            if last_id is not None:
+                params.append(('id', f'lt.{last_id}'))
+            response = requests.get(url, headers=cls._get_headers(), params=params)
+            if response.status_code != 200:
+                raise Exception(f"Fetching {table} page failed: {response.status_code} - {response.text[:200]}")
+            rows = response.json()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
+
+    @classmethod
+    def iter_visitors(cls, start_date=None, end_date=None, page_size=None):
+        """Yield visitor rows page by page, optionally limited to a date range"""
+        return cls._iter_pages('visitors', start_date, end_date, page_size)
+
+    @classmethod
+    def iter_teachers(cls, start_date=None, end_date=None, page_size=None):
+        """Yield teacher rows page by page, optionally limited to a date range"""
+        return cls._iter_pages('teachers', start_date, end_date, page_size)
+
+    @classmethod
+    def iter_visitor_keys(cls, start_date, end_date, page_size=None):
+        """Yield visitor pages projected to the import dedup key columns (plus id for paging)"""
+        select = 'id,roll_no,visit_date,entry_time,level'
+        return cls._iter_pages('visitors', start_date, end_date, page_size, select=select)
@@ -0,0 +1,85 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from backend.config import Config
+
+
+class TokenCache:
+    """Bounded LRU of verified admin JWTs keyed by token digest, plus logout revocations"""
+
+    _lock = threading.Lock()
+    _entries = OrderedDict()  # digest -> (username, exp)
+    _revoked = {}             # digest -> exp; dropped once the token would have expired anyway
+    _stats = {'hits': 0, 'misses': 0, 'expired': 0, 'revoked': 0, 'evictions': 0}
+
+    @classmethod
+    def _digest(cls, token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    @classmethod
+    def lookup(cls, token):
+        """(hit, username): a revoked token is a hit with no username; a miss needs full verification"""
+        digest = cls._digest(token)
+        now = time.time()
+        with cls._lock:
+            if digest in cls._revoked:
+                cls._stats['revoked'] += 1
+                return True, None
+
+            entry = cls._entries.get(digest)
+            if entry is None:
+                cls._stats['misses'] += 1
+                return False, None
+
+            username, exp = entry
+            if exp <= now:
+                del cls._entries[digest]
+                cls._stats['expired'] += 1
+                cls._stats['misses'] += 1
+                return False, None
+
+            cls._entries.move_to_end(digest)
+            cls._stats['hits'] += 1
+            return True, username
+
+    @classmethod
+    def store(cls, token, username, exp):
+        """Remember a token that just passed signature and expiry checks"""
+        if Config.TOKEN_CACHE_SIZE <= 0:
+            return
+        digest = cls._digest(token)
+        with cls._lock:
+            if digest in cls._revoked:
+                return
+            cls._entries[digest] = (username, exp)
+            cls._entries.move_to_end(digest)
+            while len(cls._entries) > Config.TOKEN_CACHE_SIZE:
+                cls._entries.popitem(last=False)
+                cls._stats['evictions'] += 1
+
+    @classmethod
+    def revoke(cls, token, exp):
+        """Reject a token from now on (logout), even though its signature stays valid until exp"""
+        digest = cls._digest(token)
+        now = time.time()
+        with cls._lock:
+            cls._entries.pop(digest, None)
+            for other in [d for d, other_exp in cls._revoked.items() if other_exp <= now]:
+                del cls._revoked[other]
+            if exp > now:
+                cls._revoked[digest] = exp
+
+    @classmethod
+    def metrics(cls):
+        """Hit rate and sizes for /admin/metrics"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats.update(
+                size=len(cls._entries),
+                capacity=Config.TOKEN_CACHE_SIZE,
+                revoked_tokens=len(cls._revoked),
+                hit_rate=round(stats['hits'] / lookups, 3) if lookups else None
+            )
+        return stats
@@ -0,0 +1,196 @@
+"""
+Endpoint latency and upstream-call benchmark.
+
+Runs the Flask app in-process against FakePostgrest (seeded with realistic
+volumes, optional injected latency), measures p50/p95 latency and Supabase
+calls per request for each endpoint, and compares against a stored baseline.
+Exits with code 1 when an endpoint's p95 or call count regresses. Latency
+baselines are machine-specific: record one on the machine that compares.
+
+    python benchmarks/endpoints.py                  # compare with benchmarks/baseline.json
+    python benchmarks/endpoints.py --save-baseline  # record a new baseline
+    python benchmarks/endpoints.py --latency-ms 20 --only student
+"""
+import gc
+import io
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import platform
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgrest  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Runs happen at a fixed 10:30 IST so the 4 PM auto-exit never changes the call counts
+CLOCK = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+CLOCK = CLOCK.replace(hour=10, minute=30, second=0, microsecond=0)
+
+
+def _visit_payload(i):
+    return {'name': f'Bench {i}', 'roll_no': f'B{i:05d}', 'level': 'UG', 'course': 'BSc', 'year': 'FY', 'purpose': 'Study'}
+
+
+# name -> (method, path, json body factory or None)
+ENDPOINTS = {
+    'home': ('GET', '/', None),
+    'student.check': ('GET', '/student/check/R0007', None),
+    'student.visit': ('POST', '/student/visit', _visit_payload),
+    'teacher.check': ('GET', '/teacher/check/E007', None),
+    'admin.check_session': ('GET', '/admin/check_session', None),
+    'admin.visitors_today': ('GET', '/admin/visitors/today', None),
+    'admin.visitors_all': ('GET', '/admin/visitors/all', None),
+    'admin.teachers_all': ('GET', '/admin/teachers/all', None),
+    'admin.analytics_advanced': ('GET', '/admin/analytics/advanced', None),
+    'admin.export_csv': ('GET', '/admin/export_data?format=csv&population=students', None)
+}
+
+
+def _percentile(samples, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+
+def build_app(server):
+    """create_app() wired to the fake server, with state dirs in a throwaway directory"""
+    from backend.config import Config
+    from backend.supabase_direct import SupabaseDirect
+
+    state_dir = tempfile.mkdtemp(prefix='library_bench_')
+    Config.SUPABASE_URL = server.url
+    Config.SECRET_KEY = Config.JWT_SECRET_KEY = 'endpoint-benchmark-secret-key-0123456789'
+    Config.RATE_LIMIT_ENABLED = False
+    for name in dir(Config):
+        if name.endswith('_DIR') and name != 'ASSET_DIST_DIR':
+            setattr(Config, name, os.path.join(state_dir, name.lower()))
+        elif name.endswith('_PATH') and isinstance(getattr(Config, name), str):
+            setattr(Config, name, os.path.join(state_dir, f'{name.lower()}.sqlite3'))
+    SupabaseDirect._get_indian_time = classmethod(lambda cls: CLOCK)
+
+    from backend.app import create_app
+    from backend.routes.admin_routes import create_jwt_token
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app()
+    client = app.test_client()
+    client.set_cookie('admin_token', create_jwt_token('admin'))
+    return app, client
+
+
+def measure(client, server, name, iterations, warmup):
+    """{'p50_ms', 'p95_ms', 'calls'} for one endpoint (calls = Supabase requests per request)"""
+    method, path, payload = ENDPOINTS[name]
+    headers = {'Accept-Encoding': 'gzip'}
+    samples, calls = [], 0
+    gc.collect()  # start each endpoint without garbage left by the previous one
+    for i in range(warmup + iterations):
+        body = payload(i) if payload else None
+        before = server.call_count()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the app's per-request logging
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()  # drain streamed bodies inside the timed region
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            sys.exit(f"❌ {name}: {method} {path} returned {response.status_code}: {response.get_data(as_text=True)[:300]}")
+        if i >= warmup:
+            samples.append(elapsed)
+            calls += server.call_count() - before
+    return {
+        'p50_ms': round(_percentile(samples, 50), 2),
+        'p95_ms': round(_percentile(samples, 95), 2),
+        'calls': round(calls / iterations, 2)
+    }
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Regression messages: p95 beyond tolerance (plus absolute slack) or more upstream calls"""
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base['p95_ms'] * (1 + tolerance) + slack_ms
+        if result['p95_ms'] > limit:
+            failures.append(f"{name}: p95 {result['p95_ms']:.1f} ms > {limit:.1f} ms (baseline {base['p95_ms']:.1f} ms)")
+        if result['calls'] > base['calls'] + 0.01:
+            failures.append(f"{name}: {result['calls']:g} upstream calls/request > baseline {base['calls']:g}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=3, help='unmeasured requests per endpoint first')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected Supabase latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='random +/- latency per call')
+    parser.add_argument('--students', type=int, default=2500, help='seeded student visits')
+    parser.add_argument('--teachers', type=int, default=300, help='seeded teacher visits')
+    parser.add_argument('--days', type=int, default=90, help='days of history the visits span')
+    parser.add_argument('--only', help='run endpoints whose name contains this text')
+    parser.add_argument('--tolerance', type=float, default=0.50, help='allowed relative p95 growth')
+    parser.add_argument('--slack-ms', type=float, default=5, help='allowed absolute p95 growth on top')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='write results as the new baseline')
+    args = parser.parse_args()
+    if args.save_baseline and args.only:
+        parser.error('--save-baseline records every endpoint; drop --only')
+
+    settings = {
+        'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'students': args.students,
+        'teachers': args.teachers, 'days': args.days, 'iterations': args.iterations
+    }
+    server = FakePostgrest(args.latency_ms, args.jitter_ms)
+    server.seed(args.students, args.teachers, args.days, today=CLOCK.date()).start()
+    try:
+        app, client = build_app(server)
+        names = [name for name in ENDPOINTS if not args.only or args.only in name]
+        print(f"🏁 {len(names)} endpoints x {args.iterations} requests, {args.latency_ms:g} ms injected latency, "
+              f"{args.students} student / {args.teachers} teacher visits")
+        print(f"\n{'endpoint':<26} {'p50 ms':>8} {'p95 ms':>8} {'calls/req':>10}")
+        results = {}
+        for name in names:
+            results[name] = measure(client, server, name, args.iterations, args.warmup)
+            r = results[name]
+            print(f"{name:<26} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['calls']:>10g}")
+    finally:
+        server.stop()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'settings': settings, 'endpoints': results}, f, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except OSError:
+        print(f"\n⚠️ No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    if baseline.get('settings') != settings:
+        sys.exit(f"\n❌ Baseline was recorded with {baseline.get('settings')}, not {settings}")
+
+    print()
+    failures = compare(results, baseline['endpoints'], args.tolerance, args.slack_ms)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ No regressions against {os.path.relpath(args.baseline, ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+In-process, PostgREST-compatible fake of the Supabase REST API.
+
+Implements the subset SupabaseDirect uses (eq/gte/lte/lt/gt/is/not/in filters,
+select/order/limit/offset, insert/update/delete) over in-memory tables, with
+optional injected latency and per-table call counters.
+
+    server = FakePostgrest(latency_ms=20, jitter_ms=5).seed().start()
+    Config.SUPABASE_URL = server.url
+"""
+import json
+import time
+import random
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+
+def _matches(row, column, condition):
+    """PostgREST horizontal filter, e.g. ('visit_date', 'gte.2024-01-01')"""
+    value = row.get(column)
+    operator, _, argument = condition.partition('.')
+    if operator == 'not':
+        return not _matches(row, column, argument)
+    if operator == 'is':
+        return value is None if argument == 'null' else str(value).lower() == argument
+    if operator == 'in':
+        return str(value) in argument.strip('()').split(',')
+    if value is None:
+        return False
+    if isinstance(value, int) and argument.lstrip('-').isdigit():
+        argument = int(argument)
+    else:
+        value = str(value)
+    if operator == 'eq':
+        return value == argument
+    if operator == 'gte':
+        return value >= argument
+    if operator == 'lte':
+        return value <= argument
+    if operator == 'gt':
+        return value > argument
+    if operator == 'lt':
+        return value < argument
+    raise ValueError(f"Unsupported filter: {column}={condition}")
+
+
+class FakePostgrest:
+    """Threaded fake Supabase REST server backed by in-memory tables"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, seed=1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tables = {'visitors': [], 'teachers': [], 'admin': []}
+        self.calls = Counter()  # (method, table) -> count
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ==================== DATA ====================
+
+    def seed(self, students=2500, teachers=300, days=90, today=None, inside_today=40):
+        """Realistic volumes: visits spread over `days`, some students still inside today"""
+        rnd = random.Random(1)
+        today = today or date.today()
+        start = today - timedelta(days=days)
+        courses = {'UG': ['BSc', 'BCom', 'BA', 'BMS'], 'PG': ['MSc', 'MCom', 'MA']}
+
+        visitors = []
+        for i in range(students):
+            visit_date = today if i < inside_today else start + timedelta(days=rnd.randrange(days + 1))
+            level = rnd.choice(['JC', 'UG', 'UG', 'PG'])
+            row = {
+                'id': i + 1, 'name': f'Student {i}', 'roll_no': f'R{i % 600:04d}', 'level': level,
+                'course': 'Junior College' if level == 'JC' else rnd.choice(courses[level]),
+                'year': None if level == 'JC' else rnd.choice(['FY', 'SY', 'TY']),
+                'jc_year': rnd.choice(['FYJC', 'SYJC']) if level == 'JC' else None,
+                'jc_stream': rnd.choice(['Science', 'Commerce', 'Arts']) if level == 'JC' else None,
+                'purpose': rnd.choice(['Study', 'Reading', 'Research', 'Borrow/Return Books']),
+                'visit_date': visit_date.isoformat(), 'visit_day': visit_date.strftime('%A'),
+                'entry_time': f'{rnd.randint(8, 15):02d}:{rnd.randint(0, 59):02d}:00',
+                'exit_time': None if i < inside_today else f'{rnd.randint(16, 17):02d}:{rnd.randint(0, 59):02d}:00'
+            }
+            visitors.append(row)
+
+        teacher_rows = []
+        for i in range(teachers):
+            visit_date = start + timedelta(days=rnd.randrange(days + 1))
+            teacher_rows.append({
+                'id': i + 1, 'name': f'Teacher {i % 40}', 'employee_id': f'E{i % 40:03d}',
+                'designation': rnd.choice(['Professor', 'Assistant Professor', 'Lecturer']),
+                'nature_of_work': rnd.choice(['Reference', 'Research', 'Reading']),
+                'purpose': 'Library Work', 'notes': '',
+                'visit_date': visit_date.isoformat(), 'visit_day': visit_date.strftime('%A'),
+                'entry_time': f'{rnd.randint(9, 14):02d}:00:00', 'exit_time': f'{rnd.randint(15, 17):02d}:30:00'
+            })
+
+        with self._lock:
+            self.tables['visitors'] = visitors
+            self.tables['teachers'] = teacher_rows
+        return self
+
+    def _select(self, table, query):
+        rows = self.tables.get(table, [])
+        columns, order, limit, offset = '*', None, None, 0
+        for key, value in query:
+            if key == 'select':
+                columns = value
+            elif key == 'order':
+                order = value
+            elif key == 'limit':
+                limit = int(value)
+            elif key == 'offset':
+                offset = int(value)
+            else:
+                rows = [row for row in rows if _matches(row, key, value)]
+        if order:
+            for part in reversed(order.split(',')):
+                column, _, direction = part.partition('.')
+                rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith('desc'))
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        if columns != '*':
+            names = columns.split(',')
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return rows
+
+    def _insert(self, table, items):
+        rows = self.tables.setdefault(table, [])
+        next_id = max((row['id'] for row in rows), default=0) + 1
+        created = []
+        for item in items:
+            row = dict(item, id=next_id)
+            row.setdefault('exit_time', None)
+            rows.append(row)
+            created.append(row)
+            next_id += 1
+        return created
+
+    def _update(self, table, query, changes):
+        ids = {row['id'] for row in self._select(table, query)}
+        updated = []
+        for row in self.tables.get(table, []):
+            if row['id'] in ids:
+                row.update(changes)
+                updated.append(row)
+        return updated
+
+    def _delete(self, table, query):
+        ids = {row['id'] for row in self._select(table, query)}
+        self.tables[table] = [row for row in self.tables.get(table, []) if row['id'] not in ids]
+
+    # ==================== HTTP ====================
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _request(self, method):
+                url = urlparse(self.path)
+                table = url.path.rstrip('/').rsplit('/', 1)[-1] if url.path.rstrip('/') != '/rest/v1' else ''
+                body = None
+                if self.headers.get('Content-Length'):
+                    body = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'null')
+                fake.record(method, table)
+                return table, parse_qsl(url.query), body
+
+            def _send(self, status, payload=None):
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                table, query, _ = self._request('GET')
+                if not table:
+                    return self._send(200, {})
+                with fake._lock:
+                    rows = fake._select(table, query)
+                self._send(200, rows)
+
+            def do_POST(self):
+                table, _, body = self._request('POST')
+                with fake._lock:
+                    rows = fake._insert(table, body if isinstance(body, list) else [body])
+                self._send(201, rows)
+
+            def do_PATCH(self):
+                table, query, body = self._request('PATCH')
+                with fake._lock:
+                    rows = fake._update(table, query, body or {})
+                self._send(200, rows)
+
+            def do_DELETE(self):
+                table, query, _ = self._request('DELETE')
+                with fake._lock:
+                    fake._delete(table, query)
+                self._send(204)
+
+        return Handler
+
+    def record(self, method, table):
+        """Count the call, then hold the response for the injected latency"""
+        with self._lock:
+            self.calls[(method, table)] += 1
+            delay = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def call_count(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    # ==================== LIFECYCLE ====================
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,77 @@
+"""
+Startup import budget for create_app().
+
+Runs a fresh interpreter with `python -X importtime`, summarizes the slowest
+modules and fails (exit code 1) when a heavy dependency is imported at startup
+or the total import time exceeds the budget.
+
+    python benchmarks/import_time.py [--budget-ms 500] [--top 15]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the import/export/report code paths may load these, on first use
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'pyarrow')
+
+STARTUP = "from backend.app import create_app; create_app()"
+
+
+def measure():
+    """[(module, self_us, cumulative_us, depth)] for one cold create_app()"""
+    env = dict(os.environ)
+    env.setdefault('SECRET_KEY', 'import-time-benchmark')
+    env.setdefault('SUPABASE_URL', 'https://example.supabase.co')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"create_app() failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=500, help='maximum total import time')
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to list')
+    args = parser.parse_args()
+
+    modules = measure()
+    # Top-level entries (depth 0) already include everything they imported
+    total_ms = sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000
+    heavy = sorted({name for name, _, _, _ in modules if name.split('.')[0] in HEAVY_MODULES})
+
+    print(f"📦 {len(modules)} modules imported by create_app() in {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda m: -m[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(sorted({n.split('.')[0] for n in heavy}))}")
+    if total_ms > args.budget_ms:
+        failures.append(f"startup imports took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Startup import budget met")
+
+
+if __name__ == '__main__':
+    main()
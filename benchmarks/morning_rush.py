@@ -0,0 +1,379 @@
+"""
+Morning-rush load test for the student entry/exit kiosks.
+
+Simulates N kiosks running the flows of visitor_form.html and exit_form.html
+against the app backed by FakePostgrest:
+
+    entry kiosk: load /student/ once, then per student: fill the form (think
+                 time) -> POST /student/visit
+    exit kiosk:  load /student/exit once, then per student: type the roll
+                 number (a /student/check once typing pauses for the 300 ms
+                 debounce, from the 3rd character) -> think -> /student/check
+                 -> PUT /student/exit/<id>
+
+Exit kiosks check out students entered earlier in the run (or seeded as inside).
+The app runs behind one trusted proxy hop and, by default, every kiosk sends the
+same X-Forwarded-For: the college NAT address all tablets share. --per-kiosk-ip
+gives each kiosk its own address instead. Reports throughput, p50/p95/p99
+latency, 429/503s and errors per endpoint.
+
+    python benchmarks/morning_rush.py --kiosks 40 --duration 60
+    python benchmarks/morning_rush.py --debounce-ms 0 --per-kiosk-ip
+    python benchmarks/morning_rush.py --gunicorn-workers 4 --gunicorn-threads 4 --latency-ms 30
+"""
+import io
+import os
+import sys
+import json
+import time
+import queue
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import contextlib
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgrest  # noqa: E402
+
+SECRET_KEY = 'morning-rush-secret-key-0123456789abcdef'
+
+# Seeded students still inside (FakePostgrest.seed: the first `inside_today` rows)
+SEEDED_INSIDE = 40
+
+# The rush happens at 09:00 IST; keeps the 4 PM auto-exit out of in-process runs
+CLOCK = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+CLOCK = CLOCK.replace(hour=9, minute=0, second=0, microsecond=0)
+
+# Public address of the college network every kiosk sits behind
+SHARED_CLIENT_IP = '203.0.113.10'
+
+COURSES = {'UG': ['BSc', 'BCom', 'BA', 'BMS'], 'PG': ['MSc', 'MCom', 'MA']}
+
+
+class Stats:
+    """Thread-safe latency samples and outcomes per endpoint label"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.sessions = defaultdict(int)
+
+    def record(self, label, elapsed_ms, status):
+        with self._lock:
+            self.samples[label].append(elapsed_ms)
+            self.statuses[label][status] += 1
+
+    def session_done(self, kind):
+        with self._lock:
+            self.sessions[kind] += 1
+
+
+class Kiosk(threading.Thread):
+    """One kiosk tablet looping over students until the deadline"""
+
+    def __init__(self, number, role, base_url, stats, inside, args, deadline):
+        super().__init__(daemon=True)
+        self.number = number
+        self.role = role
+        self.base_url = base_url
+        self.stats = stats
+        self.inside = inside
+        self.args = args
+        self.deadline = deadline
+        self.random = random.Random(number)
+        self.session = requests.Session()
+        if args.per_kiosk_ip:
+            self.session.headers['X-Forwarded-For'] = f'10.0.{number // 250}.{number % 250 + 1}'
+        else:
+            self.session.headers['X-Forwarded-For'] = SHARED_CLIENT_IP
+        self.entered = 0
+
+    def _call(self, method, path, label, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.args.timeout, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 'error'
+        self.stats.record(label, (time.perf_counter() - started) * 1000, status)
+        return response
+
+    def _sleep(self, seconds):
+        """Sleep without overrunning the deadline; False once the run is over"""
+        time.sleep(max(0.0, min(seconds, self.deadline - time.time())))
+        return time.time() < self.deadline
+
+    def _pause(self, mean_ms):
+        """Exponentially distributed think time; False once the run is over"""
+        return self._sleep(self.random.expovariate(1000.0 / mean_ms) if mean_ms > 0 else 0.0)
+
+    def _payload(self):
+        self.entered += 1
+        level = self.random.choice(['JC', 'UG', 'UG', 'PG'])
+        payload = {
+            'name': f'Kiosk {self.number} Student {self.entered}',
+            'roll_no': f'K{self.number:03d}{self.entered:04d}',
+            'level': level,
+            'purpose': self.random.choice(['Study', 'Reading', 'Research', 'Borrow/Return Books'])
+        }
+        if level == 'JC':
+            payload.update(course='Junior College', jc_year=self.random.choice(['FYJC', 'SYJC']),
+                           jc_stream=self.random.choice(['Science', 'Commerce', 'Arts']), year=None)
+        else:
+            payload.update(course=self.random.choice(COURSES[level]), year=self.random.choice(['FY', 'SY', 'TY']),
+                           jc_year=None, jc_stream=None)
+        return payload
+
+    def entry(self):
+        if not self._pause(self.args.think_ms):
+            return
+        payload = self._payload()
+        response = self._call('POST', '/student/visit', 'POST /student/visit', json=payload)
+        if response is not None and response.status_code == 201:
+            self.inside.put(payload['roll_no'])
+            self.stats.session_done('entries')
+
+    def exit(self):
+        try:
+            roll_no = self.inside.get(timeout=1)
+        except queue.Empty:
+            return
+        # exit_form.html checks once typing pauses for the debounce, from the 3rd character
+        gaps = [self.random.expovariate(1000.0 / self.args.typing_ms) if self.args.typing_ms > 0 else 0.0
+                for _ in roll_no]
+        for length in range(1, len(roll_no) + 1):
+            if not self._sleep(gaps[length - 1]):
+                return
+            settled = length == len(roll_no) or gaps[length] * 1000 >= self.args.debounce_ms
+            if length >= 3 and settled:
+                self._call('GET', f'/student/check/{roll_no[:length]}', 'GET /student/check/<roll>')
+        if not self._pause(self.args.think_ms / 4):
+            return
+
+        response = self._call('GET', f'/student/check/{roll_no}', 'GET /student/check/<roll>')
+        try:
+            visitor = response.json().get('visitor') if response is not None and response.ok else None
+        except ValueError:
+            visitor = None
+        if not visitor or visitor.get('exit_time'):
+            return
+        response = self._call('PUT', f"/student/exit/{visitor['id']}", 'PUT /student/exit/<id>')
+        if response is not None and response.ok:
+            self.stats.session_done('exits')
+
+    def run(self):
+        page = '/student/' if self.role == 'entry' else '/student/exit'
+        self._call('GET', page, f'GET {page}', headers={'Accept-Encoding': 'gzip, br'})
+        while time.time() < self.deadline:
+            if self.role == 'entry':
+                self.entry()
+            else:
+                self.exit()
+
+
+# ==================== APP UNDER TEST ====================
+
+def _state_env(state_dir):
+    """Job, cache and outbox locations inside a throwaway directory"""
+    from backend.config import Config
+    env = {}
+    for name in dir(Config):
+        if name.endswith('_DIR') and name != 'ASSET_DIST_DIR':
+            env[name] = os.path.join(state_dir, name.lower())
+        elif name.endswith('_PATH') and isinstance(getattr(Config, name), str):
+            env[name] = os.path.join(state_dir, f'{name.lower()}.sqlite3')
+    return env
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def in_process_app(server, rate_limit):
+    """create_app() on a threaded Werkzeug server in this process"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from backend.config import Config
+    from backend.supabase_direct import SupabaseDirect
+
+    for name, value in _state_env(tempfile.mkdtemp(prefix='library_rush_')).items():
+        setattr(Config, name, value)
+    Config.SUPABASE_URL = server.url
+    Config.SECRET_KEY = Config.JWT_SECRET_KEY = SECRET_KEY
+    Config.RATE_LIMIT_ENABLED = rate_limit
+    Config.TRUSTED_PROXY_HOPS = 1
+    SupabaseDirect._get_indian_time = classmethod(lambda cls: CLOCK)
+
+    from backend.app import create_app
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app()
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    http = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    try:
+        yield f'http://127.0.0.1:{http.server_port}'
+    finally:
+        http.shutdown()
+
+
+@contextlib.contextmanager
+def gunicorn_app(server, rate_limit, workers, threads):
+    """wsgi:app under gunicorn, the way it would be sized in production"""
+    port = _free_port()
+    env = dict(os.environ, **_state_env(tempfile.mkdtemp(prefix='library_rush_')))
+    env.update(
+        SUPABASE_URL=server.url, SECRET_KEY=SECRET_KEY, JWT_SECRET_KEY=SECRET_KEY,
+        RATE_LIMIT_ENABLED='true' if rate_limit else 'false', TRUSTED_PROXY_HOPS='1', PYTHONUNBUFFERED='1'
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        for _ in range(100):
+            if process.poll() is not None:
+                sys.exit(f"❌ gunicorn exited with code {process.returncode}")
+            try:
+                requests.get(f'{url}/health', timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.2)
+        else:
+            sys.exit("❌ gunicorn did not start within 20s")
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+# ==================== REPORT ====================
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+def summarize(stats, elapsed_s, upstream_calls):
+    rows = {}
+    for label in sorted(stats.samples):
+        samples, statuses = stats.samples[label], stats.statuses[label]
+        total = len(samples)
+        throttled = sum(count for status, count in statuses.items() if status in (429, 503))
+        errors = sum(count for status, count in statuses.items() if status == 'error' or (status >= 400 and status not in (429, 503)))
+        rows[label] = {
+            'requests': total, 'rps': round(total / elapsed_s, 2),
+            'p50_ms': round(_percentile(samples, 50), 1), 'p95_ms': round(_percentile(samples, 95), 1),
+            'p99_ms': round(_percentile(samples, 99), 1), 'max_ms': round(max(samples), 1),
+            'throttled': throttled, 'errors': errors, 'error_rate': round(errors / total, 4)
+        }
+    return {
+        'elapsed_s': round(elapsed_s, 1), 'sessions': dict(stats.sessions),
+        'upstream_calls': upstream_calls, 'upstream_rps': round(upstream_calls / elapsed_s, 2), 'endpoints': rows
+    }
+
+
+def print_report(report):
+    print(f"\n{'endpoint':<28} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'429/503':>8} {'errors':>7}")
+    for label, r in report['endpoints'].items():
+        print(f"{label:<28} {r['requests']:>6} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['throttled']:>8} {r['error_rate'] * 100:>6.1f}%")
+    sessions = report['sessions']
+    print(f"\n👥 {sessions.get('entries', 0)} entries and {sessions.get('exits', 0)} exits in {report['elapsed_s']:g}s "
+          f"({(sessions.get('entries', 0) + sessions.get('exits', 0)) / report['elapsed_s']:.1f} students/s)")
+    throttled = sum(r['throttled'] for r in report['endpoints'].values())
+    requests_total = sum(r['requests'] for r in report['endpoints'].values())
+    print(f"🚦 {throttled} of {requests_total} requests throttled (429/503)")
+    print(f"🗄️ {report['upstream_calls']} Supabase calls ({report['upstream_rps']:g}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kiosks', type=int, default=20, help='concurrent kiosks')
+    parser.add_argument('--exit-share', type=float, default=0.25, help='fraction of kiosks running the exit flow')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--ramp', type=float, default=5, help='seconds over which kiosks come online')
+    parser.add_argument('--think-ms', type=float, default=3000, help='mean form-filling time per student')
+    parser.add_argument('--typing-ms', type=float, default=150, help='mean delay between roll-number keystrokes')
+    parser.add_argument('--debounce-ms', type=float, default=300,
+                        help='pause before the exit form checks a roll number (0 = every keystroke)')
+    parser.add_argument('--per-kiosk-ip', action='store_true',
+                        help='give each kiosk its own client IP instead of one shared NAT address')
+    parser.add_argument('--timeout', type=float, default=30, help='client timeout per request (s)')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='injected Supabase latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=5.0, help='random +/- latency per call')
+    parser.add_argument('--students', type=int, default=2500, help='seeded student visits')
+    parser.add_argument('--no-rate-limit', action='store_true', help='disable the per-client rate limiter')
+    parser.add_argument('--gunicorn-workers', type=int, default=0, help='run wsgi:app under gunicorn with this many workers')
+    parser.add_argument('--gunicorn-threads', type=int, default=1, help='threads per gunicorn worker')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    server = FakePostgrest(args.latency_ms, args.jitter_ms)
+    server.seed(args.students, inside_today=SEEDED_INSIDE, today=CLOCK.date()).start()
+    inside = queue.Queue()
+    for i in range(SEEDED_INSIDE):
+        inside.put(f'R{i:04d}')
+
+    rate_limit = not args.no_rate_limit
+    if args.gunicorn_workers:
+        target = gunicorn_app(server, rate_limit, args.gunicorn_workers, args.gunicorn_threads)
+        mode = f'gunicorn {args.gunicorn_workers} worker(s) x {args.gunicorn_threads} thread(s)'
+    else:
+        target = in_process_app(server, rate_limit)
+        mode = 'in-process threaded server'
+
+    exit_kiosks = round(args.kiosks * args.exit_share)
+    stats = Stats()
+    try:
+        with target as base_url:
+            print(f"🏃 {args.kiosks} kiosks ({args.kiosks - exit_kiosks} entry, {exit_kiosks} exit) for {args.duration:g}s "
+                  f"against {mode}, {args.latency_ms:g}±{args.jitter_ms:g} ms Supabase latency")
+            print(f"🌐 {'one client IP per kiosk' if args.per_kiosk_ip else f'all kiosks behind {SHARED_CLIENT_IP}'}, "
+                  f"{args.debounce_ms:g} ms lookup debounce")
+            server.reset_calls()
+            started = time.time()
+            deadline = started + args.duration
+            kiosks = []
+            # The in-process app logs every request to stdout
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                for number in range(args.kiosks):
+                    role = 'exit' if number < exit_kiosks else 'entry'
+                    kiosk = Kiosk(number, role, base_url, stats, inside, args, deadline)
+                    kiosks.append(kiosk)
+                    kiosk.start()
+                    time.sleep(args.ramp / max(args.kiosks, 1))
+                for kiosk in kiosks:
+                    kiosk.join()
+            elapsed = time.time() - started
+    finally:
+        server.stop()
+
+    report = summarize(stats, elapsed, server.call_count())
+    report['settings'] = dict(vars(args), mode=mode)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
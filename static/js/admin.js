@@ -1172,8 +1172,10 @@ async function exportData(format) {
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.href = url;
+            const disposition = response.headers.get('Content-Disposition') || '';
+            const match = disposition.match(/filename="?([^";]+)"?/);
             const fileExtension = format === 'excel' ? 'xlsx' : format;
-            a.download = `library_export_${new Date().toISOString().split('T')[0]}.${fileExtension}`;
+            a.download = match ? match[1] : `library_export_${new Date().toISOString().split('T')[0]}.${fileExtension}`;
             document.body.appendChild(a);
             a.click();
             window.URL.revokeObjectURL(url);
@@ -1331,17 +1333,65 @@ function logoutUser() {
 
 // ==================== EMAIL REPORT FUNCTIONS ====================
 
-async function sendMonthlyReport() {
-    if (!confirm('📧 Send monthly report via email?\n\nThis will send the previous month\'s visitor data as CSV and Excel files.')) return;
-    showNotification('📤 Sending monthly report... Please wait.', 'info');
+// Outcome of a report job status, or null while delivery has not settled
+function reportOutcome(job, label) {
+    if (job.status === 'failed') throw new Error(job.error || `Failed to send ${label}`);
+    if (job.status !== 'done') return null;
+
+    const delivery = job.delivery || [];
+    if (delivery.some(entry => entry.status === 'dead')) throw new Error(`Failed to deliver ${label}`);
+    if (delivery.every(entry => entry.status === 'sent')) return { queued: false };
+    // The mail server is failing; the outbox keeps retrying on its own
+    if (delivery.some(entry => entry.status === 'pending' && entry.attempts > 0)) return { queued: true };
+    return null;
+}
+
+// Reports are generated by a background job and mailed from the outbox; poll until delivery settles
+async function waitForReportJob(statusUrl, label) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) throw new Error(job.error || 'Report job not found');
+        const outcome = reportOutcome(job, label);
+        if (outcome) return outcome;
+    }
+}
+
+async function queueReport(url, label) {
+    const response = await fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' } });
+    const result = await response.json();
+    if (!response.ok) {
+        showNotification('❌ ' + (result.error || `Failed to send ${label}`), 'error');
+        return;
+    }
     try {
-        const response = await fetch('/admin/send_monthly_report', { method: 'POST', headers: { 'Content-Type': 'application/json' } });
-        const result = await response.json();
-        if (result.success) {
-            showNotification('✅ Monthly report sent successfully! Check your email inbox.', 'success');
+        let outcome;
+        if (result.status_url) {
+            showNotification(`📤 Generating ${label} in the background...`, 'info');
+            outcome = await waitForReportJob(result.status_url, label);
         } else {
-            showNotification('❌ ' + (result.error || 'Failed to send monthly report'), 'error');
+            // Generated inside the request (serverless host): the response already carries the delivery state
+            outcome = reportOutcome(result, label) || { pending: true };
+        }
+        if (outcome.pending) {
+            showNotification(`📭 The ${label} is queued and will be delivered shortly.`, 'info');
+            return;
         }
+        if (outcome.queued) {
+            showNotification(`📭 Mail server unavailable; the ${label} is queued and will be retried automatically.`, 'info');
+            return;
+        }
+        showNotification(`✅ ${label.charAt(0).toUpperCase() + label.slice(1)} sent successfully! Check your email inbox.`, 'success');
+    } catch (error) {
+        showNotification('❌ ' + error.message, 'error');
+    }
+}
+
+async function sendMonthlyReport() {
+    if (!confirm('📧 Send monthly report via email?\n\nThis will send the previous month\'s visitor data as CSV and Excel files.')) return;
+    try {
+        await queueReport('/admin/send_monthly_report', 'monthly report');
     } catch (error) {
         showNotification('❌ Connection error. Please try again.', 'error');
     }
@@ -1349,15 +1399,8 @@ async function sendMonthlyReport() {
 
 async function sendLifetimeReport() {
     if (!confirm('📧 Send lifetime report via email?\n\nThis will send ALL visitor data as CSV and Excel files.')) return;
-    showNotification('📤 Sending lifetime report... Please wait.', 'info');
     try {
-        const response = await fetch('/admin/send_lifetime_report', { method: 'POST', headers: { 'Content-Type': 'application/json' } });
-        const result = await response.json();
-        if (result.success) {
-            showNotification('✅ Lifetime report sent successfully! Check your email inbox.', 'success');
-        } else {
-            showNotification('❌ ' + (result.error || 'Failed to send lifetime report'), 'error');
-        }
+        await queueReport('/admin/send_lifetime_report', 'lifetime report');
     } catch (error) {
         showNotification('❌ Connection error. Please try again.', 'error');
     }